@@ -0,0 +1,27 @@
+"""
+Shared pytest fixtures for JK's Boutique tests
+All tests use a throwaway database, never boutique.db
+"""
+
+import pytest
+
+from main import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh, fully migrated database in a temporary folder"""
+    database = DatabaseManager(str(tmp_path / 'test.db'))
+    yield database
+    database.close()
+
+
+def make_item(product_id, name, price, quantity):
+    """Build a cart line the way ReceiptPage.add_to_cart does"""
+    return {
+        'product_id': product_id,
+        'name': name,
+        'price': price,
+        'quantity': quantity,
+        'subtotal': price * quantity,
+    }
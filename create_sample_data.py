@@ -3,11 +3,13 @@ Test Script for JK's Boutique Application
 This script demonstrates the key features
 """
 
+import argparse
 import json
 import os
+import sys
 
-def create_sample_data():
-    """Create sample data for testing"""
+def get_sample_data():
+    """Get the sample products and users"""
     
     # Sample products
     sample_products = [
@@ -37,6 +39,12 @@ def create_sample_data():
         }
     ]
     
+    return sample_products, sample_users
+
+def create_sample_data():
+    """Create sample data for testing"""
+    sample_products, sample_users = get_sample_data()
+    
     # Save to files
     with open('inventory.json', 'w') as f:
         json.dump(sample_products, f, indent=4)
@@ -59,17 +67,68 @@ def create_sample_data():
     print("\n🚀 Ready to run the application!")
     print("   Run: python main.py")
 
+def seed_database(db_path='boutique.db', scale=1, batch_size=5000):
+    """Write the sample data straight into the SQLite database
+    
+    With scale > 1 every sample product is repeated in numbered variants,
+    e.g. scale=1000 gives 8,000 products. Existing users are kept.
+    """
+    from main import DatabaseManager
+    
+    sample_products, sample_users = get_sample_data()
+    db = DatabaseManager(db_path)
+    try:
+        added_products = 0
+        batch = []
+        for variant in range(1, scale + 1):
+            for product in sample_products:
+                name = product['name'] if scale == 1 else f"{product['name']} #{variant}"
+                batch.append((None, name, product['price'], product['quantity']))
+                if len(batch) >= batch_size:
+                    added_products += db.bulk_upsert_products(batch)
+                    batch = []
+        if batch:
+            added_products += db.bulk_upsert_products(batch)
+        
+        added_users = db.bulk_insert_users([
+            (u['username'], u['password'], u['full_name'], u['email']) for u in sample_users
+        ])
+    finally:
+        db.close()
+    
+    print(f"✅ {added_products:,} sample products added to {db_path}")
+    print(f"✅ {added_users} sample user accounts added to {db_path}")
+    print("\n🚀 Ready to run the application!")
+    print("   Run: python main.py")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create sample data for JK's Boutique")
+    parser.add_argument('--sqlite', action='store_true',
+                        help='seed the SQLite database instead of writing JSON files')
+    parser.add_argument('--db', default='boutique.db', help='database file for --sqlite (default: boutique.db)')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='numbered copies of each sample product for --sqlite (default: 1)')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("JK's Boutique - Test Data Generator")
     print("=" * 60)
     print()
     
+    if args.scale < 1 or (args.scale != 1 and not args.sqlite):
+        print("❌ --scale must be at least 1 and needs --sqlite")
+        sys.exit(1)
+    
+    if args.sqlite:
+        seed_database(args.db, args.scale)
+        print("\n" + "=" * 60)
+        sys.exit(0)
+    
     if os.path.exists('inventory.json') or os.path.exists('users.json'):
         response = input("⚠️  Data files already exist. Overwrite? (yes/no): ")
         if response.lower() not in ['yes', 'y']:
             print("❌ Operation cancelled.")
-            exit()
+            sys.exit(1)
     
     create_sample_data()
     print("\n" + "=" * 60)
@@ -0,0 +1,192 @@
+"""
+Load Test Data Generator for JK's Boutique Application
+Fills a database with a realistic volume of products and sales history
+
+Example (1M products, 5M receipts, ~20M receipt items over two years):
+    python generate_load_data.py --db load_test.db --products 1000000 \
+        --receipts 5000000 --items-per-receipt 4 --days 730 --seed 42
+
+The same seed always produces the same data: sales are dated back from
+--end (midnight UTC, a fixed date by default), not from today. Generation runs with
+synchronous=OFF, so don't point it at a database you can't afford to lose
+if the machine crashes halfway.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from main import DatabaseManager
+
+CATEGORIES = [
+    "Kids T-Shirt", "Kids Dress", "Kids Shorts", "Baby Romper", "Kids Jeans",
+    "Kids Jacket", "Baby Blanket", "School Uniform", "Kids Sweater", "Baby Bib",
+    "Kids Pyjamas", "Kids Skirt", "Baby Socks", "Kids Cap", "Kids Sandals",
+]
+COLOURS = ["Blue", "Pink", "White", "Red", "Green", "Yellow", "Grey", "Navy", "Purple", "Black"]
+SIZES = ["0-3M", "3-6M", "6-12M", "1-2Y", "3-4Y", "5-6Y", "7-8Y", "9-10Y", "11-12Y"]
+PRICES = [price for price in range(5000, 95001, 500)]
+
+GENERATION_PROFILE = {'synchronous': 'OFF', 'journal_mode': 'WAL'}
+
+DEFAULT_END = '2025-01-01'  # generated sales stop at midnight UTC at the start of this day
+
+
+def product_name(product_id):
+    """Deterministic product name for a generated product ID"""
+    category = CATEGORIES[product_id % len(CATEGORIES)]
+    colour = COLOURS[(product_id // len(CATEGORIES)) % len(COLOURS)]
+    size = SIZES[(product_id // (len(CATEGORIES) * len(COLOURS))) % len(SIZES)]
+    return f"{category} ({colour}, {size}) #{product_id}"
+
+
+def product_price(product_id):
+    """Deterministic price for a generated product ID"""
+    return float(PRICES[(product_id * 7919) % len(PRICES)])
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def generate_products(db, count, rng, batch_size, verbose=True):
+    """Insert `count` products, returns the (first_id, last_id) range used"""
+    first_id = db.get_next_product_id()
+    last_id = first_id + count - 1
+
+    rows = ((product_id, product_name(product_id), product_price(product_id), rng.randint(0, 200))
+            for product_id in range(first_id, last_id + 1))
+    done = 0
+    for batch in batched(rows, batch_size):
+        db.bulk_upsert_products(batch)
+        done += len(batch)
+        if verbose:
+            print(f"\r   Products: {done:,}/{count:,}", end='', flush=True)
+    if verbose:
+        print()
+    return first_id, last_id
+
+
+def generate_receipts(db, count, product_range, items_per_receipt, days, end, rng, batch_size, verbose=True):
+    """Insert `count` receipts with their items spread over the `days` days before `end` (UTC)"""
+    first_product, last_product = product_range
+    db.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'receipts'")
+    result = db.cursor.fetchone()
+    first_receipt_id = (result[0] + 1) if result else 1
+    first_number = db.get_next_receipt_number()
+
+    start = end - timedelta(days=days)
+    step = (end - start).total_seconds() / max(count, 1)
+    max_lines = max(1, 2 * items_per_receipt - 1)
+
+    items_written = 0
+    done = 0
+    for batch_start in range(0, count, batch_size):
+        batch_end = min(batch_start + batch_size, count)
+        receipts = []
+        items = []
+        for i in range(batch_start, batch_end):
+            receipt_id = first_receipt_id + i
+            receipt_number = first_number + i
+            created = start + timedelta(seconds=i * step + rng.random() * step)
+            total = 0.0
+            for _ in range(rng.randint(1, max_lines)):
+                product_id = rng.randint(first_product, last_product)
+                price = product_price(product_id)
+                quantity = rng.randint(1, 3)
+                subtotal = price * quantity
+                total += subtotal
+                items.append((receipt_id, product_id, product_name(product_id), price, quantity, subtotal))
+            receipts.append((
+                receipt_id, receipt_number, total,
+                f"invoice_{receipt_number}_{created.strftime('%Y%m%d_%H%M%S')}.pdf",
+                created.strftime('%Y-%m-%d %H:%M:%S')
+            ))
+
+        db.cursor.execute('BEGIN')
+        db.cursor.executemany('''
+            INSERT INTO receipts (receipt_id, receipt_number, total_amount, filename, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', receipts)
+        db.cursor.executemany('''
+            INSERT INTO receipt_items (receipt_id, product_id, product_name, price, quantity, subtotal)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', items)
+        db.cursor.execute('UPDATE receipt_sequence SET last_number = MAX(last_number, ?) WHERE id = 1',
+                          (first_number + batch_end - 1,))
+        db.conn.commit()
+
+        items_written += len(items)
+        done = batch_end
+        if verbose:
+            print(f"\r   Receipts: {done:,}/{count:,} ({items_written:,} items)", end='', flush=True)
+    if verbose:
+        print()
+    return items_written
+
+
+def generate_load_data(db_path, products=10000, receipts=50000, items_per_receipt=4,
+                       days=365, seed=42, batch_size=10000, verbose=True, end=DEFAULT_END):
+    """Fill db_path with generated products and sales, returns a summary dict
+    
+    end is a 'YYYY-MM-DD' date; the sales run up to midnight UTC at its start.
+    """
+    rng = random.Random(seed)
+    end = datetime.strptime(end, '%Y-%m-%d')
+    db = DatabaseManager(db_path, profile=GENERATION_PROFILE)
+    start = time.perf_counter()
+    try:
+        product_range = generate_products(db, products, rng, batch_size, verbose)
+        items = 0
+        if receipts and products:
+            items = generate_receipts(db, receipts, product_range, items_per_receipt,
+                                      days, end, rng, batch_size, verbose)
+        db.cursor.execute('ANALYZE')
+        db.conn.commit()
+    finally:
+        db.close()
+
+    return {
+        'products': products,
+        'receipts': receipts if products else 0,
+        'receipt_items': items,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate load test data for JK's Boutique")
+    parser.add_argument('--db', default='load_test.db', help='database file (default: load_test.db)')
+    parser.add_argument('--products', type=int, default=10000, help='products to create (default: 10000)')
+    parser.add_argument('--receipts', type=int, default=50000, help='receipts to create (default: 50000)')
+    parser.add_argument('--items-per-receipt', type=int, default=4,
+                        help='average lines per receipt (default: 4)')
+    parser.add_argument('--days', type=int, default=365,
+                        help='spread receipts over this many days before --end (default: 365)')
+    parser.add_argument('--end', default=DEFAULT_END,
+                        help=f'date the sales run up to, YYYY-MM-DD (default: {DEFAULT_END})')
+    parser.add_argument('--seed', type=int, default=42, help='random seed (default: 42)')
+    parser.add_argument('--batch-size', type=int, default=10000,
+                        help='rows per transaction (default: 10000)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JK's Boutique - Load Test Data Generator")
+    print("=" * 60)
+    print(f"\n📁 Database: {args.db} (seed {args.seed})\n")
+
+    summary = generate_load_data(args.db, args.products, args.receipts, args.items_per_receipt,
+                                 args.days, args.seed, args.batch_size, end=args.end)
+
+    print(f"\n✅ {summary['products']:,} products, {summary['receipts']:,} receipts, "
+          f"{summary['receipt_items']:,} receipt items")
+    print(f"⏱️  {summary['seconds']:.1f}s")
+    print("\n" + "=" * 60)
@@ -0,0 +1,167 @@
+"""
+Bulk Product Import for JK's Boutique Application
+Streams a supplier catalogue (CSV or JSON Lines) into the products table
+
+CSV files need a header row with the columns: name, price, quantity
+(product_id and sku are optional). JSON Lines files have one object per
+line with the same keys. Rows with a product_id update that product if it
+exists; an sku (barcode) already used by another product rejects the row.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from itertools import islice
+
+from main import DatabaseManager, normalize_sku, validate_product_fields
+
+
+def detect_format(path):
+    """Guess the file format from the extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_records(path, file_format=None):
+    """Yield (line_number, record) pairs one at a time from a CSV or JSON Lines file"""
+    file_format = file_format or detect_format(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if file_format == 'jsonl':
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    record = e
+                yield line_number, record
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                # reader.line_num is the physical line the record ended on
+                yield reader.line_num, record
+
+
+def parse_record(record):
+    """Validate one record, returns a (product_id, name, price, quantity, sku) row"""
+    if isinstance(record, Exception):
+        raise ValueError(f"Invalid JSON: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("Expected an object with name, price and quantity")
+
+    name, price, quantity = validate_product_fields(
+        record.get('name'), record.get('price'), record.get('quantity')
+    )
+    sku = normalize_sku(record.get('sku'))
+
+    product_id = record.get('product_id')
+    if product_id in (None, ''):
+        product_id = None
+    else:
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid product_id!")
+        if product_id <= 0:
+            raise ValueError("Invalid product_id!")
+
+    return product_id, name, price, quantity, sku
+
+
+def import_products(db, path, file_format=None, batch_size=5000, on_reject=None):
+    """Stream a catalogue file into the database in batched transactions
+
+    on_reject(line_number, record, reason) is called for every invalid row.
+    Returns a dict with the imported/rejected counts and throughput.
+    """
+    records = iter_records(path, file_format)
+    imported = 0
+    rejected = 0
+    start = time.perf_counter()
+
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+
+        parsed = []
+        for line_number, record in chunk:
+            try:
+                parsed.append((line_number, record, parse_record(record)))
+            except ValueError as e:
+                rejected += 1
+                if on_reject:
+                    on_reject(line_number, record, str(e))
+
+        if parsed:
+            try:
+                imported += db.bulk_upsert_products([row for _, _, row in parsed])
+            except sqlite3.IntegrityError:
+                # An sku in this batch is taken: redo it row by row to find which
+                for line_number, record, row in parsed:
+                    try:
+                        imported += db.bulk_upsert_products([row])
+                    except sqlite3.IntegrityError:
+                        rejected += 1
+                        if on_reject:
+                            on_reject(line_number, record, f"SKU {row[4]} is already used by another product!")
+
+    elapsed = time.perf_counter() - start
+    return {
+        'imported': imported,
+        'rejected': rejected,
+        'seconds': elapsed,
+        'rows_per_sec': (imported + rejected) / elapsed if elapsed else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import products from a CSV or JSON Lines file")
+    parser.add_argument('path', help='catalogue file to import')
+    parser.add_argument('--format', choices=['csv', 'jsonl'],
+                        help='file format (default: guessed from the extension)')
+    parser.add_argument('--db', default='boutique.db', help='database file (default: boutique.db)')
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help='rows per transaction (default: 5000)')
+    parser.add_argument('--rejects', help='write rejected rows to this CSV file')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JK's Boutique - Bulk Product Import")
+    print("=" * 60)
+
+    rejects_file = open(args.rejects, 'w', newline='', encoding='utf-8') if args.rejects else None
+    rejects_writer = csv.writer(rejects_file) if rejects_file else None
+    if rejects_writer:
+        rejects_writer.writerow(['line', 'reason', 'record'])
+    shown = []
+
+    def report_reject(line_number, record, reason):
+        if rejects_writer:
+            rejects_writer.writerow([line_number, reason, record])
+        if len(shown) < 10:
+            shown.append(f"   Line {line_number}: {reason}")
+
+    db = DatabaseManager(args.db)
+    try:
+        stats = import_products(db, args.path, args.format, args.batch_size, report_reject)
+    finally:
+        db.close()
+        if rejects_file:
+            rejects_file.close()
+
+    print(f"\n✅ Imported: {stats['imported']:,} products")
+    print(f"❌ Rejected: {stats['rejected']:,} rows")
+    for line in shown:
+        print(line)
+    if stats['rejected'] > len(shown):
+        print(f"   ... and {stats['rejected'] - len(shown):,} more"
+              + (f" (see {args.rejects})" if args.rejects else ""))
+    print(f"\n⏱️  {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+    print("\n" + "=" * 60)
@@ -6,35 +6,46 @@ Author: Kiwumulo Joanah
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import bisect
 import json
 import os
+import re
+import shutil
 import sys
+import textwrap
 import sqlite3
-from datetime import datetime
+import queue
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
+from reportlab import rl_config
 
 
 class Product:
     """Product class to represent inventory items"""
-    def __init__(self, product_id, name, price, quantity):
+    def __init__(self, product_id, name, price, quantity, sku=None):
         self.product_id = product_id
         self.name = name
         self.price = price
         self.quantity = quantity
+        self.sku = sku
     
     def to_dict(self):
         return {
             'product_id': self.product_id,
             'name': self.name,
             'price': self.price,
-            'quantity': self.quantity
+            'quantity': self.quantity,
+            'sku': self.sku
         }
     
     @classmethod
     def from_dict(cls, data):
-        return cls(data['product_id'], data['name'], data['price'], data['quantity'])
+        return cls(data['product_id'], data['name'], data['price'], data['quantity'], data.get('sku'))
 
 
 class User:
@@ -58,18 +69,456 @@ class User:
         return cls(data['username'], data['password'], data['full_name'], data['email'])
 
 
+def validate_product_fields(name, price_str, quantity_str):
+    """Validate product form/import fields, returns (name, price, quantity)
+    
+    Raises ValueError with a user-facing message when a field is invalid.
+    """
+    name = str(name).strip() if name is not None else ''
+    price_str = str(price_str).strip() if price_str is not None else ''
+    quantity_str = str(quantity_str).strip() if quantity_str is not None else ''
+    
+    if not name or not price_str or not quantity_str:
+        raise ValueError("All fields are required!")
+    
+    try:
+        price = float(price_str)
+        quantity = int(quantity_str)
+    except ValueError:
+        raise ValueError("Invalid price or quantity format!")
+    
+    if price <= 0 or quantity <= 0:
+        raise ValueError("Price and quantity must be positive!")
+    
+    return name, price, quantity
+
+
+def normalize_sku(sku):
+    """SKU/barcode as stored: trimmed, None when left blank
+    
+    Raises ValueError when it contains spaces, which no barcode does.
+    """
+    sku = str(sku).strip() if sku is not None else ''
+    if any(char.isspace() for char in sku):
+        raise ValueError("SKU/barcode cannot contain spaces!")
+    return sku or None
+
+
+def write_products_json(db, path, page_size=1000):
+    """Write every product, SKU included, to path as a JSON array; returns the count
+    
+    Products are read a page at a time so the catalogue is never all in memory.
+    """
+    with open(path, 'w') as f:
+        f.write('[')
+        after_id, count = 0, 0
+        while True:
+            page = db.get_product_export_page(after_id, page_size)
+            for product in page:
+                f.write(',\n' if count else '\n')
+                f.write(textwrap.indent(json.dumps(Product(*product).to_dict(), indent=4), '    '))
+                count += 1
+            if len(page) < page_size:
+                break
+            after_id = page[-1][0]
+        f.write('\n]' if count else ']')
+    return count
+
+
+def parse_created_at(created_at):
+    """Local time for a receipts.created_at value, which SQLite records in UTC"""
+    recorded = datetime.strptime(created_at[:19], '%Y-%m-%d %H:%M:%S')
+    return recorded.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+class InsufficientStockError(Exception):
+    """Raised when a sale asks for more units than are left in stock"""
+    def __init__(self, product_id, name, requested, available):
+        self.product_id = product_id
+        self.name = name
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Only {available} of '{name}' left in stock (requested {requested})")
+
+
+class Cart:
+    """The items being sold at the till, with their stock reserved in memory
+    
+    Each product has one line; adding a product that is already in the cart
+    raises the quantity of its line. The cart keeps the Product it was last
+    given for each line (a snapshot of its row) and never reserves more
+    units than that snapshot has in stock, so adding an item needs no
+    database round trip. checkout() checks the stock again when the sale is
+    recorded.
+    """
+    def __init__(self):
+        self.products = {}    # product_id -> Product snapshot
+        self.quantities = {}  # product_id -> units reserved, in the order the lines were added
+        self.skus = {}        # scanned barcode -> product_id
+    
+    def __len__(self):
+        return len(self.quantities)
+    
+    def add(self, product, quantity=1, sku=None):
+        """Reserve quantity more units of product, returns the position of its line
+        
+        Raises ValueError for a quantity below one and InsufficientStockError
+        when the cart would hold more units than are in stock; the cart is
+        left unchanged.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive!")
+        requested = self.quantities.get(product.product_id, 0) + quantity
+        if requested > product.quantity:
+            raise InsufficientStockError(product.product_id, product.name, requested, product.quantity)
+        self.products[product.product_id] = product
+        self.quantities[product.product_id] = requested
+        if sku:
+            self.skus[sku] = product.product_id
+        return list(self.quantities).index(product.product_id)
+    
+    def remove(self, product_id):
+        """Drop a product's line and free its reservation"""
+        self.quantities.pop(product_id, None)
+        self.products.pop(product_id, None)
+        self.skus = {sku: scanned for sku, scanned in self.skus.items() if scanned != product_id}
+    
+    def clear(self):
+        self.products.clear()
+        self.quantities.clear()
+        self.skus.clear()
+    
+    def remove_sold(self, items):
+        """Take the units of a recorded sale (its cart-item dicts) off their lines
+        
+        Units added to a line after the sale was taken stay in the cart, and
+        lines left with none are dropped. Snapshots keep their old stock until
+        update_stock() brings newer ones.
+        """
+        for item in items:
+            product_id = item['product_id']
+            if product_id not in self.quantities:
+                continue  # removed while the sale was being saved
+            left = self.quantities[product_id] - item['quantity']
+            if left > 0:
+                self.quantities[product_id] = left
+            else:
+                self.remove(product_id)
+    
+    def product_for_sku(self, sku):
+        """The snapshot of a product already scanned into this cart, None otherwise"""
+        return self.products.get(self.skus.get(sku))
+    
+    def available(self, product_id):
+        """Units of a product in the cart's snapshot that are not reserved yet"""
+        product = self.products.get(product_id)
+        return product.quantity - self.quantities[product_id] if product else None
+    
+    def update_stock(self, products):
+        """Take newer snapshots of products in the cart, returns the lines now short of stock"""
+        short = []
+        for product in products:
+            if product.product_id in self.products:
+                self.products[product.product_id] = product
+                if self.quantities[product.product_id] > product.quantity:
+                    short.append(product)
+        return short
+    
+    def line(self, product_id):
+        """A line as the cart-item dict used by checkout() and the invoice"""
+        product = self.products[product_id]
+        quantity = self.quantities[product_id]
+        return {
+            'product_id': product_id,
+            'name': product.name,
+            'price': product.price,
+            'quantity': quantity,
+            'subtotal': product.price * quantity,
+        }
+    
+    def items(self):
+        return [self.line(product_id) for product_id in self.quantities]
+    
+    @property
+    def total(self):
+        return sum(self.products[product_id].price * quantity for product_id, quantity in self.quantities.items())
+
+
+# Products with fewer units than this count as low stock
+LOW_STOCK_THRESHOLD = 10
+
+
+def create_product_search(cursor):
+    """Migration step: full-text index on product names, kept in sync by triggers
+    
+    The prefix option also indexes the first 1 to 4 letters of every word,
+    so a half-typed word reads one ready-made list of products instead of
+    merging the lists of every word it starts (60 ms for "b" on a million
+    products without it). Past four letters few enough words share the
+    prefix that merging stays under 5 ms; indexing longer prefixes as well
+    only made imports slower and the index bigger. The update trigger
+    skips rows whose name did not change, so restocks and price upserts
+    never touch the index.
+    SQLite builds without FTS5 get a case-insensitive index on the name
+    for prefix search instead.
+    """
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+            USING fts5(name, content='products', content_rowid='product_id', prefix='1 2 3 4')
+        ''')
+    except sqlite3.OperationalError:
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_name_nocase ON products (name COLLATE NOCASE)')
+        return
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert
+        AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts (rowid, name) VALUES (NEW.product_id, NEW.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete
+        AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', OLD.product_id, OLD.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_update
+        AFTER UPDATE OF name ON products
+        WHEN OLD.name IS NOT NEW.name
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', OLD.product_id, OLD.name);
+            INSERT INTO products_fts (rowid, name) VALUES (NEW.product_id, NEW.name);
+        END
+    ''')
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+# Ordered schema migrations: (version, description, steps).
+# Each step is either an SQL statement or a callable taking the cursor.
+# Migrations run once at startup, in order, each inside its own
+# transaction together with the bump of schema_version, so existing
+# boutique.db files are upgraded in place. Never edit a released
+# migration - append a new one instead.
+SCHEMA_MIGRATIONS = [
+    (1, "Add secondary indexes for receipts, receipt items and stock levels", [
+        'CREATE INDEX IF NOT EXISTS idx_receipts_created_at ON receipts (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_receipts_receipt_number ON receipts (receipt_number)',
+        'CREATE INDEX IF NOT EXISTS idx_receipt_items_receipt_id ON receipt_items (receipt_id)',
+        'CREATE INDEX IF NOT EXISTS idx_receipt_items_product_id ON receipt_items (product_id)',
+        # Partial: a sale that leaves plenty of stock doesn't touch the index
+        f'CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products (quantity) '
+        f'WHERE quantity < {LOW_STOCK_THRESHOLD}',
+    ]),
+    (2, "Allocate receipt numbers from a counter table and make them unique", [
+        '''
+            CREATE TABLE IF NOT EXISTS receipt_sequence (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_number INTEGER NOT NULL
+            )
+        ''',
+        # Receipts that got a duplicate number (two terminals, retries) keep
+        # the first one; later duplicates are moved above the current maximum
+        '''
+            UPDATE receipts
+            SET receipt_number = (SELECT MAX(receipt_number) FROM receipts) + receipt_id
+            WHERE receipt_id NOT IN (
+                SELECT MIN(receipt_id) FROM receipts GROUP BY receipt_number
+            )
+        ''',
+        'DROP INDEX IF EXISTS idx_receipts_receipt_number',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_receipts_receipt_number ON receipts (receipt_number)',
+        '''
+            INSERT INTO receipt_sequence (id, last_number)
+            SELECT 1, COALESCE(MAX(receipt_number), 0) FROM receipts
+        ''',
+    ]),
+    (3, "Keep dashboard counters in inventory_summary with triggers", [
+        '''
+            CREATE TABLE IF NOT EXISTS inventory_summary (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                product_count INTEGER NOT NULL,
+                total_value REAL NOT NULL,
+                low_stock_count INTEGER NOT NULL
+            )
+        ''',
+        f'''
+            INSERT INTO inventory_summary (id, product_count, total_value, low_stock_count)
+            SELECT 1, COUNT(*), COALESCE(SUM(price * quantity), 0),
+                   COALESCE(SUM(quantity < {LOW_STOCK_THRESHOLD}), 0)
+            FROM products
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS trg_products_summary_insert
+            AFTER INSERT ON products
+            BEGIN
+                UPDATE inventory_summary
+                SET product_count = product_count + 1,
+                    total_value = total_value + NEW.price * NEW.quantity,
+                    low_stock_count = low_stock_count + (NEW.quantity < {LOW_STOCK_THRESHOLD})
+                WHERE id = 1;
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS trg_products_summary_update
+            AFTER UPDATE OF price, quantity ON products
+            BEGIN
+                UPDATE inventory_summary
+                SET total_value = total_value + NEW.price * NEW.quantity - OLD.price * OLD.quantity,
+                    low_stock_count = low_stock_count + (NEW.quantity < {LOW_STOCK_THRESHOLD})
+                                                      - (OLD.quantity < {LOW_STOCK_THRESHOLD})
+                WHERE id = 1;
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS trg_products_summary_delete
+            AFTER DELETE ON products
+            BEGIN
+                UPDATE inventory_summary
+                SET product_count = product_count - 1,
+                    total_value = total_value - OLD.price * OLD.quantity,
+                    low_stock_count = low_stock_count - (OLD.quantity < {LOW_STOCK_THRESHOLD})
+                WHERE id = 1;
+            END
+        ''',
+    ]),
+    # idx_receipts_history replaces idx_receipts_created_at: history pages seek
+    # on its (created_at, receipt_id) key and running totals over a date range
+    # read total_amount from it without touching the table. One index instead
+    # of two keeps every sale one index write cheaper
+    (4, "Index receipt amounts for history filters and running totals", [
+        'DROP INDEX IF EXISTS idx_receipts_created_at',
+        'CREATE INDEX IF NOT EXISTS idx_receipts_history ON receipts (created_at, receipt_id, total_amount)',
+        'CREATE INDEX IF NOT EXISTS idx_receipts_total_amount ON receipts (total_amount)',
+    ]),
+    # Every product write appends the product_id to product_changes. The
+    # change_seq rowid is handed out under the write lock, so it follows
+    # commit order and "everything after seq N" never misses a change
+    # committed late by another connection. Appending only touches the last
+    # page of the table, where keeping one row per product rewrote a random
+    # row and index entry on each write. A delete is logged too, so the
+    # InventoryPage refresh can drop the product from the list as well
+    (5, "Track product changes for incremental inventory refresh", [
+        '''
+            CREATE TABLE IF NOT EXISTS product_changes (
+                change_seq INTEGER PRIMARY KEY,
+                product_id INTEGER NOT NULL
+            )
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_products_change_insert
+            AFTER INSERT ON products
+            BEGIN
+                INSERT INTO product_changes (product_id) VALUES (NEW.product_id);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_products_change_update
+            AFTER UPDATE ON products
+            BEGIN
+                INSERT INTO product_changes (product_id) VALUES (NEW.product_id);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_products_change_delete
+            AFTER DELETE ON products
+            BEGIN
+                INSERT INTO product_changes (product_id) VALUES (OLD.product_id);
+            END
+        ''',
+    ]),
+    (6, "Index product names for the ReceiptPage search", [
+        create_product_search,
+    ]),
+    # NULL for products without a barcode; a UNIQUE index allows many NULLs
+    (7, "Add an SKU/barcode to products", [
+        'ALTER TABLE products ADD COLUMN sku TEXT',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products (sku)',
+    ]),
+]
+
+
 class DatabaseManager:
     """Class to manage SQLite database operations"""
-    def __init__(self, db_name='boutique.db'):
+    # Connection settings applied every time the database is opened.
+    # WAL lets readers and the writer work side by side and, together with
+    # synchronous=NORMAL, turns each commit into an append to the WAL file
+    # instead of a full fsync of the database.
+    DEFAULT_CONNECTION_PROFILE = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,            # negative = KiB, i.e. ~16 MB page cache
+        'mmap_size': 64 * 1024 * 1024,   # bytes of the file mapped into memory
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,            # milliseconds to wait on a locked database
+        'cached_statements': 256,        # prepared statements kept per connection
+    }
+    
+    # What a bare sqlite3.connect() gives you, kept for benchmarks/comparison
+    LEGACY_CONNECTION_PROFILE = {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+        'cached_statements': 128,
+    }
+    
+    # Tables the Database Browser window lists
+    BROWSABLE_TABLES = ('products', 'users', 'receipts', 'receipt_items')
+    # Newest product_changes rows kept by prune_product_changes()
+    PRODUCT_CHANGES_KEPT = 10000
+    
+    def __init__(self, db_name='boutique.db', profile=None):
         self.db_name = db_name
+        self.profile = dict(self.DEFAULT_CONNECTION_PROFILE)
+        if profile:
+            self.profile.update(profile)
         self.conn = None
         self.cursor = None
         self.initialize_database()
     
+    def connect(self):
+        """Open the SQLite connection and apply the connection profile"""
+        self.conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.profile['busy_timeout'] / 1000,
+            cached_statements=self.profile['cached_statements']
+        )
+        self.cursor = self.conn.cursor()
+        self.apply_connection_profile()
+    
+    def apply_connection_profile(self):
+        """Apply the PRAGMA settings from the connection profile"""
+        profile = self.profile
+        self.cursor.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        self.cursor.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        self.cursor.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+        self.cursor.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+        self.cursor.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+        self.cursor.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+    
+    def get_connection_settings(self):
+        """Read back the effective connection settings from SQLite"""
+        synchronous_names = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+        temp_store_names = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+        settings = {}
+        for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                       'temp_store', 'busy_timeout'):
+            self.cursor.execute(f"PRAGMA {pragma}")
+            row = self.cursor.fetchone()
+            settings[pragma] = row[0] if row else None
+        settings['synchronous'] = synchronous_names.get(settings['synchronous'], settings['synchronous'])
+        settings['temp_store'] = temp_store_names.get(settings['temp_store'], settings['temp_store'])
+        settings['cached_statements'] = self.profile['cached_statements']
+        return settings
+    
     def initialize_database(self):
         """Create database connection and tables if they don't exist"""
-        self.conn = sqlite3.connect(self.db_name)
-        self.cursor = self.conn.cursor()
+        self.connect()
         
         # Create products table
         self.cursor.execute('''
@@ -121,7 +570,55 @@ class DatabaseManager:
             )
         ''')
         
+        # Create schema_version table used by the migrations
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         self.conn.commit()
+        self.run_migrations()
+        
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")
+        self.has_product_fts = self.cursor.fetchone() is not None
+    
+    def get_schema_version(self):
+        """Get the version of the last applied migration (0 if none)"""
+        self.cursor.execute('SELECT MAX(version) FROM schema_version')
+        result = self.cursor.fetchone()[0]
+        return result if result else 0
+    
+    def run_migrations(self):
+        """Apply pending schema migrations in order, returns the versions applied"""
+        current_version = self.get_schema_version()
+        applied = []
+        for version, description, steps in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            try:
+                self.cursor.execute('BEGIN IMMEDIATE')
+                # Another process may have migrated while we waited for the lock
+                if self.get_schema_version() >= version:
+                    self.conn.rollback()
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(self.cursor)
+                    else:
+                        self.cursor.execute(step)
+                self.cursor.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                    (version, description)
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            applied.append(version)
+        return applied
     
     def close(self):
         """Close database connection"""
@@ -129,25 +626,208 @@ class DatabaseManager:
             self.conn.close()
     
     # Product operations
-    def add_product(self, name, price, quantity):
-        """Add a new product to the database"""
+    def add_product(self, name, price, quantity, sku=None):
+        """Add a new product to the database
+        
+        Raises sqlite3.IntegrityError if another product already has the SKU.
+        """
         self.cursor.execute('''
-            INSERT INTO products (name, price, quantity)
-            VALUES (?, ?, ?)
-        ''', (name, price, quantity))
+            INSERT INTO products (name, price, quantity, sku)
+            VALUES (?, ?, ?, ?)
+        ''', (name, price, quantity, sku))
         self.conn.commit()
         return self.cursor.lastrowid
     
+    def bulk_upsert_products(self, rows, update_existing=True):
+        """Insert or update many products in one transaction
+        
+        rows are (product_id, name, price, quantity) tuples, optionally
+        followed by an sku. Rows with a product_id update that product if it
+        exists (or are skipped when update_existing is False), rows with None
+        get a new ID. An update without an sku keeps the one the product has.
+        Returns the number of rows written; an SKU that belongs to another
+        product raises sqlite3.IntegrityError and nothing is written.
+        """
+        rows = [tuple(row) + (None,) * (5 - len(row)) for row in rows]
+        if update_existing:
+            on_conflict = '''DO UPDATE
+                    SET name = excluded.name, price = excluded.price,
+                        quantity = excluded.quantity, sku = COALESCE(excluded.sku, sku),
+                        updated_at = CURRENT_TIMESTAMP'''
+        else:
+            on_conflict = 'DO NOTHING'
+        try:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            # Rows go through a staging table and into products with a single
+            # statement: the search index triggers then fire inside one
+            # statement and FTS5 writes the whole batch at once, where one
+            # INSERT per row made it flush a tiny segment per row (5x slower)
+            self.cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS product_import (
+                    product_id INTEGER, name TEXT, price REAL, quantity INTEGER, sku TEXT
+                )
+            ''')
+            self.cursor.executemany('INSERT INTO temp.product_import VALUES (?, ?, ?, ?, ?)', rows)
+            self.cursor.execute(f'''
+                INSERT INTO products (product_id, name, price, quantity, sku)
+                SELECT product_id, name, price, quantity, sku FROM temp.product_import
+                WHERE true ORDER BY rowid
+                ON CONFLICT (product_id) {on_conflict}
+            ''')
+            written = self.cursor.rowcount
+            self.cursor.execute('DELETE FROM temp.product_import')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return written
+    
+    def get_next_product_id(self):
+        """Get the ID AUTOINCREMENT will hand out next, without scanning products"""
+        self.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'products'")
+        result = self.cursor.fetchone()
+        return (result[0] + 1) if result else 1
+    
     def get_all_products(self):
         """Get all products from the database"""
         self.cursor.execute('SELECT product_id, name, price, quantity FROM products ORDER BY product_id')
         return self.cursor.fetchall()
     
+    def get_product_page(self, after_id=0, limit=200):
+        """Up to limit products with product_id above after_id, in product_id order
+        
+        A primary-key range read, so the InventoryPage pays the same for the
+        first page and the last, however large the catalogue.
+        """
+        self.cursor.execute('''
+            SELECT product_id, name, price, quantity FROM products
+            WHERE product_id > ?
+            ORDER BY product_id
+            LIMIT ?
+        ''', (after_id, limit))
+        return self.cursor.fetchall()
+    
+    def get_product_export_page(self, after_id=0, limit=1000):
+        """Like get_product_page, with each product's sku as a fifth column"""
+        self.cursor.execute('''
+            SELECT product_id, name, price, quantity, sku FROM products
+            WHERE product_id > ?
+            ORDER BY product_id
+            LIMIT ?
+        ''', (after_id, limit))
+        return self.cursor.fetchall()
+    
+    def get_table_columns(self, table):
+        """Column names of one of BROWSABLE_TABLES"""
+        if table not in self.BROWSABLE_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        return [column[1] for column in self.cursor.fetchall()]
+    
+    def get_table_page(self, table, after_rowid=0, limit=200):
+        """Up to limit rows of one of BROWSABLE_TABLES after after_rowid, each led by its rowid"""
+        if table not in self.BROWSABLE_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        self.cursor.execute(f"SELECT rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                            (after_rowid, limit))
+        return self.cursor.fetchall()
+    
+    def get_product_changes(self, since=None):
+        """Products changed and product_ids deleted since the cursor `since`
+        
+        Returns (changed_products, deleted_ids, cursor); pass cursor back in
+        on the next call. since=None only returns a cursor for "now". The
+        cursor is the highest change_seq, read in the same snapshot as the
+        changes, so a write committed later always comes after it.
+        Returns None if changes after since have been pruned; the caller
+        has to load everything again.
+        """
+        self.cursor.execute('BEGIN')
+        try:
+            self.cursor.execute('''
+                SELECT (SELECT COALESCE(MAX(change_seq), 0) FROM product_changes),
+                       (SELECT COALESCE(MIN(change_seq), 1) FROM product_changes)
+            ''')
+            cursor, oldest = self.cursor.fetchone()
+            if since is None:
+                return [], [], cursor
+            if since < oldest - 1:
+                return None
+            self.cursor.execute('''
+                SELECT c.product_id, p.name, p.price, p.quantity
+                FROM product_changes c LEFT JOIN products p ON p.product_id = c.product_id
+                WHERE c.change_seq > ?
+            ''', (since,))
+            rows = set(self.cursor.fetchall())  # a product changed twice is logged twice
+        finally:
+            self.conn.commit()
+        changed = sorted(row for row in rows if row[1] is not None)
+        deleted = sorted(row[0] for row in rows if row[1] is None)
+        return changed, deleted, cursor
+    
+    def prune_product_changes(self, keep=None):
+        """Delete all but the newest keep rows of product_changes, returns how many went
+        
+        A change_seq range delete. Cursors from before the kept rows get
+        None from get_product_changes() and reload instead.
+        """
+        if keep is None:
+            keep = self.PRODUCT_CHANGES_KEPT
+        try:
+            self.cursor.execute('''
+                DELETE FROM product_changes
+                WHERE change_seq <= (SELECT MAX(change_seq) FROM product_changes) - ?
+            ''', (keep,))
+            pruned = self.cursor.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return pruned
+    
+    def search_products(self, text, limit=20):
+        """Up to limit products whose name matches what has been typed so far
+        
+        Every word must appear in the name; the last one may still be
+        unfinished, unless the text ends with a space. Matches come in
+        product_id order rather than ranked: ranking has to score every
+        match, which for a short prefix over a large catalogue is far slower
+        than the 20 ms a keystroke can wait. Without FTS5 the text is matched
+        against the start of the name.
+        """
+        words = re.findall(r'\w+', text.lower())
+        if not words:
+            return []
+        if self.has_product_fts:
+            terms = [f'"{word}"' for word in words]
+            if not text[-1].isspace():
+                terms[-1] += '*'
+            self.cursor.execute('''
+                SELECT p.product_id, p.name, p.price, p.quantity
+                FROM products_fts JOIN products p ON p.product_id = products_fts.rowid
+                WHERE products_fts MATCH ?
+                LIMIT ?
+            ''', (' '.join(terms), limit))
+        else:
+            prefix = re.sub(r'([\\%_])', r'\\\1', text.strip())
+            self.cursor.execute('''
+                SELECT product_id, name, price, quantity FROM products
+                WHERE name LIKE ? ESCAPE '\\'
+                ORDER BY name COLLATE NOCASE
+                LIMIT ?
+            ''', (prefix + '%', limit))
+        return self.cursor.fetchall()
+    
     def get_product(self, product_id):
         """Get a specific product by ID"""
         self.cursor.execute('SELECT product_id, name, price, quantity FROM products WHERE product_id = ?', (product_id,))
         return self.cursor.fetchone()
     
+    def get_product_by_sku(self, sku):
+        """Get the product with this SKU/barcode, None if there is none (one idx_products_sku lookup)"""
+        self.cursor.execute('SELECT product_id, name, price, quantity FROM products WHERE sku = ?', (sku,))
+        return self.cursor.fetchone()
+    
     def update_product(self, product_id, name, price, quantity):
         """Update a product"""
         self.cursor.execute('''
@@ -164,16 +844,89 @@ class DatabaseManager:
         self.conn.commit()
         return self.cursor.rowcount > 0
     
-    def get_low_stock_count(self, threshold=10):
+    def get_low_stock_count(self, threshold=LOW_STOCK_THRESHOLD):
         """Get count of products with low stock"""
+        if threshold == LOW_STOCK_THRESHOLD:
+            return self.get_inventory_summary()[2]
         self.cursor.execute('SELECT COUNT(*) FROM products WHERE quantity < ?', (threshold,))
         return self.cursor.fetchone()[0]
     
+    def get_low_stock_products(self, threshold=LOW_STOCK_THRESHOLD):
+        """Get products with fewer than `threshold` units, lowest stock first
+        
+        The default threshold is written into the query, so SQLite can tell
+        idx_products_low_stock covers it; other thresholds scan products.
+        """
+        if threshold == LOW_STOCK_THRESHOLD:
+            condition, params = f'quantity < {LOW_STOCK_THRESHOLD}', ()
+        else:
+            condition, params = 'quantity < ?', (threshold,)
+        self.cursor.execute(f'''
+            SELECT product_id, name, price, quantity FROM products
+            WHERE {condition}
+            ORDER BY quantity, product_id
+        ''', params)
+        return self.cursor.fetchall()
+    
     def get_total_inventory_value(self):
         """Calculate total inventory value"""
-        self.cursor.execute('SELECT SUM(price * quantity) FROM products')
-        result = self.cursor.fetchone()[0]
-        return result if result else 0
+        return self.get_inventory_summary()[1]
+    
+    def get_product_count(self):
+        """Get the number of products"""
+        return self.get_inventory_summary()[0]
+    
+    def get_table_versions(self):
+        """{table_name: version} for the tables pages refresh from, see ChangeTracker
+        
+        The products version is the newest change_seq, which every product
+        write moves (migration 5), read from the end of product_changes
+        """
+        self.cursor.execute('SELECT COALESCE(MAX(change_seq), 0) FROM product_changes')
+        return {'products': self.cursor.fetchone()[0]}
+    
+    def get_inventory_summary(self):
+        """Get (product_count, total_value, low_stock_count) kept up to date by triggers"""
+        self.cursor.execute('''
+            SELECT product_count, total_value, low_stock_count
+            FROM inventory_summary WHERE id = 1
+        ''')
+        return self.cursor.fetchone()
+    
+    def _compute_inventory_summary(self):
+        """Compute (product_count, total_value, low_stock_count) from the products table"""
+        self.cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(price * quantity), 0),
+                   COALESCE(SUM(quantity < ?), 0)
+            FROM products
+        ''', (LOW_STOCK_THRESHOLD,))
+        return self.cursor.fetchone()
+    
+    def check_inventory_summary(self, repair=False):
+        """Compare inventory_summary with a full recount, returns True if it matches
+        
+        With repair=True a mismatching summary is rebuilt from scratch.
+        """
+        expected = self._compute_inventory_summary()
+        actual = self.get_inventory_summary()
+        consistent = (
+            expected[0] == actual[0]
+            and abs(expected[1] - actual[1]) < 0.01
+            and expected[2] == actual[2]
+        )
+        if not consistent and repair:
+            self.rebuild_inventory_summary()
+        return consistent
+    
+    def rebuild_inventory_summary(self):
+        """Recompute inventory_summary from the products table"""
+        product_count, total_value, low_stock_count = self._compute_inventory_summary()
+        self.cursor.execute('''
+            UPDATE inventory_summary
+            SET product_count = ?, total_value = ?, low_stock_count = ?
+            WHERE id = 1
+        ''', (product_count, total_value, low_stock_count))
+        self.conn.commit()
     
     # User operations
     def register_user(self, username, password, full_name, email):
@@ -188,6 +941,26 @@ class DatabaseManager:
         except sqlite3.IntegrityError:
             return False  # Username already exists
     
+    def bulk_insert_users(self, rows):
+        """Insert many users in one transaction, skipping usernames that already exist
+        
+        rows are (username, password, full_name, email) tuples.
+        Returns the number of users actually added.
+        """
+        try:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            self.cursor.executemany('''
+                INSERT INTO users (username, password, full_name, email)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (username) DO NOTHING
+            ''', rows)
+            added = self.cursor.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return added
+    
     def get_user(self, username):
         """Get user by username"""
         self.cursor.execute('SELECT username, password, full_name, email FROM users WHERE username = ?', (username,))
@@ -215,14 +988,186 @@ class DatabaseManager:
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (receipt_id, item['product_id'], item['name'], item['price'], item['quantity'], item['subtotal']))
         
+        # Keep the counter ahead of numbers assigned by the caller
+        self.cursor.execute('''
+            UPDATE receipt_sequence SET last_number = MAX(last_number, ?) WHERE id = 1
+        ''', (receipt_number,))
+        
         self.conn.commit()
         return receipt_id
     
+    def checkout(self, items, make_filename):
+        """Record a sale atomically: receipt, receipt items and stock decrement
+        
+        Everything happens in a single transaction with one commit.
+        make_filename(receipt_number) returns the invoice filename to store.
+        Returns (receipt_id, receipt_number, filename). If any product is
+        short on stock nothing is written and InsufficientStockError is raised.
+        """
+        total_amount = sum(item['subtotal'] for item in items)
+        
+        # Total quantity needed per product, in case a product appears twice
+        required = {}
+        for item in items:
+            required[item['product_id']] = required.get(item['product_id'], 0) + item['quantity']
+        
+        try:
+            # Take the write lock up front so the sale can't deadlock with another writer
+            self.cursor.execute('BEGIN IMMEDIATE')
+            
+            receipt_number = self._allocate_receipt_number()
+            filename = make_filename(receipt_number)
+            
+            self.cursor.execute('''
+                INSERT INTO receipts (receipt_number, total_amount, filename)
+                VALUES (?, ?, ?)
+            ''', (receipt_number, total_amount, filename))
+            receipt_id = self.cursor.lastrowid
+            
+            self.cursor.executemany('''
+                INSERT INTO receipt_items (receipt_id, product_id, product_name, price, quantity, subtotal)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(receipt_id, item['product_id'], item['name'], item['price'], item['quantity'], item['subtotal'])
+                  for item in items])
+            
+            # Conditional decrement: a row is only updated if enough stock is left
+            self.cursor.executemany('''
+                UPDATE products
+                SET quantity = quantity - ?, updated_at = CURRENT_TIMESTAMP
+                WHERE product_id = ? AND quantity >= ?
+            ''', [(quantity, product_id, quantity) for product_id, quantity in required.items()])
+            stock_updated = self.cursor.rowcount == len(required)
+            
+            if not stock_updated:
+                self.conn.rollback()
+                raise self._stock_shortage(items, required)
+            
+            self.conn.commit()
+        except InsufficientStockError:
+            raise
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        return receipt_id, receipt_number, filename
+    
+    def _stock_shortage(self, items, required):
+        """Build the InsufficientStockError for the first product that is short"""
+        names = {item['product_id']: item['name'] for item in items}
+        for product_id, quantity in required.items():
+            self.cursor.execute('SELECT quantity FROM products WHERE product_id = ?', (product_id,))
+            row = self.cursor.fetchone()
+            available = row[0] if row else 0
+            if available < quantity:
+                return InsufficientStockError(product_id, names[product_id], quantity, available)
+        # Stock changed again since the failed update, report the first line
+        product_id, quantity = next(iter(required.items()))
+        return InsufficientStockError(product_id, names[product_id], quantity, 0)
+    
+    def _allocate_receipt_number(self):
+        """Take the next receipt number from the counter (call inside a transaction)"""
+        self.cursor.execute('UPDATE receipt_sequence SET last_number = last_number + 1 WHERE id = 1')
+        self.cursor.execute('SELECT last_number FROM receipt_sequence WHERE id = 1')
+        return self.cursor.fetchone()[0]
+    
     def get_next_receipt_number(self):
-        """Get the next receipt number"""
-        self.cursor.execute('SELECT MAX(receipt_number) FROM receipts')
+        """Get the next receipt number (a preview only, checkout() allocates the real one)"""
+        self.cursor.execute('SELECT last_number FROM receipt_sequence WHERE id = 1')
         result = self.cursor.fetchone()[0]
-        return (result + 1) if result else 1
+        return result + 1
+    
+    def get_receipt_id_range(self, since=None, until=None):
+        """(first, last) receipt_id for sales recorded in [since, until), (None, None) if there are none"""
+        self.cursor.execute('''
+            SELECT MIN(receipt_id), MAX(receipt_id) FROM receipts
+            WHERE created_at >= COALESCE(?, '') AND created_at < COALESCE(?, '9999-12-31')
+        ''', (since, until))
+        return self.cursor.fetchone()
+    
+    def get_receipts_with_items(self, after_id=0, last_id=None, limit=500, since=None, until=None):
+        """Next batch of receipts after after_id, in receipt_id order, with their lines
+        
+        Returns a list of (receipt_id, receipt_number, total_amount, filename,
+        created_at, items) where items are cart-style dictionaries. Walking the
+        receipt_id key keeps every batch an index range, however far in we are.
+        """
+        self.cursor.execute('''
+            SELECT receipt_id, receipt_number, total_amount, filename, created_at
+            FROM receipts
+            WHERE receipt_id > ? AND receipt_id <= COALESCE(?, 9223372036854775807)
+              AND created_at >= COALESCE(?, '') AND created_at < COALESCE(?, '9999-12-31')
+            ORDER BY receipt_id
+            LIMIT ?
+        ''', (after_id, last_id, since, until, limit))
+        receipts = self.cursor.fetchall()
+        if not receipts:
+            return []
+        
+        lines = {receipt[0]: [] for receipt in receipts}
+        self.cursor.execute('''
+            SELECT receipt_id, product_id, product_name, price, quantity, subtotal
+            FROM receipt_items
+            WHERE receipt_id BETWEEN ? AND ?
+            ORDER BY receipt_id, item_id
+        ''', (receipts[0][0], receipts[-1][0]))
+        for receipt_id, product_id, name, price, quantity, subtotal in self.cursor:
+            if receipt_id in lines:
+                lines[receipt_id].append({'product_id': product_id, 'name': name, 'price': price,
+                                          'quantity': quantity, 'subtotal': subtotal})
+        return [receipt + (lines[receipt[0]],) for receipt in receipts]
+    
+    def get_receipt_with_items(self, receipt_id):
+        """One receipt with its lines, in the get_receipts_with_items() format, or None"""
+        receipts = self.get_receipts_with_items(after_id=receipt_id - 1, last_id=receipt_id, limit=1)
+        return receipts[0] if receipts else None
+    
+    @staticmethod
+    def _receipt_filter(since=None, until=None, min_amount=None, max_amount=None, receipt_number=None,
+                        amount='total_amount'):
+        """WHERE conditions and parameters for the receipt history filters"""
+        conditions, params = [], []
+        for condition, value in (('created_at >= ?', since), ('created_at < ?', until),
+                                 (f'{amount} >= ?', min_amount), (f'{amount} <= ?', max_amount),
+                                 ('receipt_number = ?', receipt_number)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return conditions, params
+    
+    def get_receipt_page(self, before=None, limit=50, since=None, until=None,
+                         min_amount=None, max_amount=None, receipt_number=None):
+        """One page of receipt history, newest first
+        
+        before is the (created_at, receipt_id) of the last row on the previous
+        page, None for the first page. Seeking to that key instead of using
+        OFFSET keeps every page an index range read, however deep. since and
+        until bound created_at (until is exclusive), min_amount and max_amount
+        bound total_amount.
+        """
+        # +total_amount keeps SQLite off idx_receipts_total_amount here: rows
+        # are read in idx_receipts_history order and amounts checked as
+        # they come, instead of sorting every match for each page
+        conditions, params = self._receipt_filter(since, until, min_amount, max_amount, receipt_number,
+                                                  amount='+total_amount')
+        if before is not None:
+            conditions.append('(created_at, receipt_id) < (?, ?)')
+            params.extend(before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        self.cursor.execute(f'''
+            SELECT receipt_id, receipt_number, total_amount, filename, created_at
+            FROM receipts
+            {where}
+            ORDER BY created_at DESC, receipt_id DESC
+            LIMIT ?
+        ''', params + [limit])
+        return self.cursor.fetchall()
+    
+    def get_receipt_totals(self, since=None, until=None, min_amount=None, max_amount=None, receipt_number=None):
+        """(count, total amount) of the receipts matching the history filters"""
+        conditions, params = self._receipt_filter(since, until, min_amount, max_amount, receipt_number)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        self.cursor.execute(f'SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM receipts {where}', params)
+        return self.cursor.fetchone()
     
     def get_receipt_history(self, limit=50):
         """Get recent receipt history"""
@@ -237,8 +1182,8 @@ class DatabaseManager:
 
 class DataManager:
     """Legacy wrapper for backward compatibility"""
-    def __init__(self, filename='inventory.json', users_filename='users.json'):
-        self.db = DatabaseManager()
+    def __init__(self, filename='inventory.json', users_filename='users.json', db_name='boutique.db'):
+        self.db = DatabaseManager(db_name)
         # Keep old filenames for reference but don't use them
         self.filename = filename
         self.users_filename = users_filename
@@ -256,8 +1201,9 @@ class DataManager:
         return None
     
     def add_product(self, product):
-        """Add a product"""
-        self.db.add_product(product.name, product.price, product.quantity)
+        """Add a product, returns the product ID assigned by the database"""
+        product.product_id = self.db.add_product(product.name, product.price, product.quantity, product.sku)
+        return product.product_id
     
     def update_product(self, product_id, name, price, quantity):
         """Update a product"""
@@ -269,10 +1215,7 @@ class DataManager:
     
     def get_next_id(self):
         """Get next product ID (not needed with auto-increment but kept for compatibility)"""
-        products = self.db.get_all_products()
-        if not products:
-            return 1
-        return max(p[0] for p in products) + 1
+        return self.db.get_next_product_id()
     
     def register_user(self, user):
         """Register a new user"""
@@ -290,6 +1233,125 @@ class DataManager:
         return self.db.username_exists(username)
 
 
+class DatabaseWorker:
+    """Runs database calls on a dedicated thread so the UI never waits on SQLite
+    
+    The worker owns its own DatabaseManager connection (a SQLite connection
+    can only be used by the thread that opened it). Requests are queued and
+    handled in order; submit() returns a concurrent.futures.Future.
+    """
+    def __init__(self, db_name='boutique.db', profile=None):
+        self.db_name = db_name
+        self.profile = profile
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='DatabaseWorker', daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        """Worker thread: open the connection, then serve requests until stopped"""
+        try:
+            db = DatabaseManager(self.db_name, profile=self.profile)
+        except Exception as e:
+            db = None
+            error = e
+        
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            future, func, args, kwargs = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            if db is None:
+                future.set_exception(error)
+                continue
+            try:
+                future.set_result(func(db, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        if db is not None:
+            db.close()
+    
+    def submit(self, func, *args, **kwargs):
+        """Queue a database call, returns a Future with its result
+        
+        func is either the name of a DatabaseManager method or a callable
+        that takes the worker's DatabaseManager as its first argument.
+        """
+        if isinstance(func, str):
+            method_name = func
+            func = lambda db, *a, **kw: getattr(db, method_name)(*a, **kw)
+        future = Future()
+        self.requests.put((future, func, args, kwargs))
+        return future
+    
+    def stop(self, timeout=5):
+        """Finish the queued requests, close the connection and stop the thread"""
+        self.requests.put(None)
+        self.thread.join(timeout)
+
+
+class ChangeTracker:
+    """Tells which pages show data that changed since they were last loaded
+    
+    poll() runs on the database worker. PRAGMA data_version moves when
+    another connection (another process on the same boutique.db) commits,
+    and the connection's total_changes when it writes itself; while neither
+    moves, poll() answers from memory without running a query. Otherwise it
+    reads a version per table from get_table_versions().
+    
+    The Tk side keeps, for every consumer (a page), the versions it last
+    loaded: is_dirty() compares them with a poll() result and mark_clean()
+    records them after a reload.
+    """
+    def __init__(self):
+        self.data_version = None
+        self.total_changes = None
+        self.versions = {}
+        self.seen = {}
+    
+    def poll(self, db):
+        """Current {table: version}, only queried when something was written"""
+        db.cursor.execute('PRAGMA data_version')
+        data_version = db.cursor.fetchone()[0]
+        total_changes = db.conn.total_changes
+        if (data_version, total_changes) != (self.data_version, self.total_changes):
+            self.versions = db.get_table_versions()
+            self.data_version, self.total_changes = data_version, total_changes
+        return dict(self.versions)
+    
+    def is_dirty(self, consumer, tables, versions):
+        """True if any of tables changed since consumer last loaded them (or never did)"""
+        seen = self.seen.get(consumer)
+        return seen is None or any(seen.get(table) != versions.get(table) for table in tables)
+    
+    def mark_clean(self, consumer, tables, versions):
+        self.seen.setdefault(consumer, {}).update({table: versions.get(table) for table in tables})
+
+
+class InvoiceCanvas(canvas.Canvas):
+    """A reportlab canvas that writes its streams without an ASCII85 pass
+    
+    Invoice streams are zlib-compressed binary; reportlab's default extra
+    ASCII85 encoding makes every PDF about a tenth bigger and slower to
+    write. reportlab only reads the setting from the global rl_config while
+    save() writes the document, so save() sets it for just that long, under
+    a lock the render threads share, and puts the previous value back.
+    """
+    use_a85 = 0
+    rl_config_lock = threading.Lock()
+    
+    def save(self):
+        with InvoiceCanvas.rl_config_lock:
+            previous = rl_config.useA85
+            rl_config.useA85 = self.use_a85
+            try:
+                canvas.Canvas.save(self)
+            finally:
+                rl_config.useA85 = previous
+
+
 class ReceiptGenerator:
     """Class to generate professional PDF invoices/receipts"""
     @staticmethod
@@ -311,14 +1373,20 @@ class ReceiptGenerator:
         return receipts_folder
     
     @staticmethod
-    def generate_receipt(items, total, receipt_number):
-        """Generate a professional invoice PDF with company branding"""
-        # Create receipts folder and get full path
-        receipts_folder = ReceiptGenerator.get_receipts_folder()
-        filename = f"invoice_{receipt_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        full_path = os.path.join(receipts_folder, filename)
-        
-        c = canvas.Canvas(full_path, pagesize=letter)
+    def build_filename(receipt_number):
+        """Build the invoice filename for a receipt number
+        
+        Invoices are sharded by month: the name is relative to the receipts
+        folder, 'YYYY/MM/invoice_<number>_<timestamp>.pdf'.
+        """
+        now = datetime.now()
+        return f"{now.strftime('%Y/%m')}/invoice_{receipt_number}_{now.strftime('%Y%m%d_%H%M%S')}.pdf"
+    
+    TEMPLATE_FORM = 'InvoiceTemplate'
+    
+    @staticmethod
+    def draw_template(c):
+        """Draw the parts of the invoice that never change: border, header, labels and footer"""
         width, height = letter
         
         # Draw border
@@ -348,11 +1416,6 @@ class ReceiptGenerator:
         c.drawString(4.5*inch, height - 2.25*inch, "Date:")
         c.drawString(4.5*inch, height - 2.5*inch, "Time:")
         
-        c.setFont("Helvetica", 11)
-        c.drawString(5.5*inch, height - 2*inch, f"{receipt_number:05d}")
-        c.drawString(5.5*inch, height - 2.25*inch, datetime.now().strftime('%Y-%m-%d'))
-        c.drawString(5.5*inch, height - 2.5*inch, datetime.now().strftime('%H:%M:%S'))
-        
         # Items Table Header
         y_position = height - 3*inch
         c.setFillColorRGB(0.17, 0.24, 0.31)
@@ -365,45 +1428,173 @@ class ReceiptGenerator:
         c.drawString(4.5*inch, y_position, "PRICE")
         c.drawString(5.7*inch, y_position, "SUBTOTAL")
         
-        # Items
+        # Footer
         c.setFillColorRGB(0, 0, 0)
-        c.setFont("Helvetica", 10)
-        y_position -= 0.35*inch
+        c.setFont("Helvetica-Oblique", 9)
+        c.drawString(1*inch, 1.2*inch, "Thank you for shopping with us!")
+        c.setFont("Helvetica", 8)
+        c.drawString(1*inch, 1*inch, "For inquiries: contact@jksboutique.com | +256-XXX-XXXXXX")
+        c.drawString(1*inch, 0.8*inch, "This is a computer-generated invoice.")
+    
+    @staticmethod
+    def stamp_template(c, use_template=True):
+        """Put the static template on the current page
+        
+        use_template=True references the template as a PDF form XObject,
+        defined the first time it is used in a document. use_template=False
+        draws it inline, as invoices were rendered before.
+        """
+        if not use_template:
+            ReceiptGenerator.draw_template(c)
+            return
+        if not c.hasForm(ReceiptGenerator.TEMPLATE_FORM):
+            c.beginForm(ReceiptGenerator.TEMPLATE_FORM)
+            ReceiptGenerator.draw_template(c)
+            c.endForm(hasImages=0)
+        c.doForm(ReceiptGenerator.TEMPLATE_FORM)
+    
+    # Item rows run from just under the table header down to LAST_ROW_Y,
+    # which leaves room for the carried-forward line above the footer
+    ROW_HEIGHT = 0.25*inch
+    FIRST_ROW_Y = letter[1] - 3.35*inch
+    LAST_ROW_Y = 1.9*inch
+    TOTAL_BOTTOM_Y = 1.5*inch
+    PAGE_COUNT_FORM = 'InvoicePageCount'
+    
+    @staticmethod
+    def start_page(c, receipt_number, issued_at, page_number, use_template=True):
+        """Begin an invoice page, returns the text object for the page's variable text
+        
+        The first page draws the template inline and later pages share it as
+        a form: on a one-page invoice the form's own object and resources
+        make the PDF bigger and slower to write than drawing it once.
+        use_template=False draws it inline on every page (kept for the
+        benchmark).
+        """
+        height = letter[1]
+        ReceiptGenerator.stamp_template(c, use_template and page_number > 1)
+        
+        text = c.beginText()
+        text.setFillColorRGB(0, 0, 0)
+        text.setFont("Helvetica", 11)
+        for x, y, value in ((5.5*inch, height - 2*inch, f"{receipt_number:05d}"),
+                            (5.5*inch, height - 2.25*inch, issued_at.strftime('%Y-%m-%d')),
+                            (5.5*inch, height - 2.5*inch, issued_at.strftime('%H:%M:%S'))):
+            text.setTextOrigin(x, y)
+            text.textOut(value)
+        
+        # "Page X of Y": Y is a form filled in once the last page is known
+        label = f"Page {page_number} of "
+        text.setFont("Helvetica", 8)
+        text.setTextOrigin(6.2*inch, 0.8*inch)
+        text.textOut(label)
+        c.saveState()
+        c.translate(6.2*inch + c.stringWidth(label, "Helvetica", 8), 0.8*inch)
+        c.doForm(ReceiptGenerator.PAGE_COUNT_FORM)
+        c.restoreState()
+        
+        text.setFont("Helvetica", 10)
+        return text
+    
+    @staticmethod
+    def subtotal_line(text, y_position, label, amount):
+        """Write a "Brought/Carried forward" line in the subtotal column"""
+        text.setFont("Helvetica-Oblique", 10)
+        text.setTextOrigin(4.5*inch, y_position)
+        text.textOut(label)
+        text.setTextOrigin(5.7*inch, y_position)
+        text.textOut(f"UGX {amount:,.0f}")
+        text.setFont("Helvetica", 10)
+    
+    @staticmethod
+    def generate_receipt(items, total, receipt_number, filename=None, receipts_folder=None, issued_at=None,
+                         use_template=True):
+        """Generate a professional invoice PDF with company branding
+        
+        issued_at is the date and time printed on the invoice, now by
+        default; reprints pass the time the sale was recorded. Only the
+        invoice details, item rows and total are drawn per invoice, the rest
+        comes from the template.
+        
+        items can be any iterable and is read once, row by row. Long invoices
+        continue on new pages with the table header repeated, the running
+        subtotal carried forward and "Page X of Y" in the footer. reportlab
+        keeps every finished page until save(), so memory still grows with
+        the length of the invoice (about 5 MB for a 10,000-line order).
+        """
+        # Create receipts folder and get full path
+        if receipts_folder is None:
+            receipts_folder = ReceiptGenerator.get_receipts_folder()
+        if filename is None:
+            filename = ReceiptGenerator.build_filename(receipt_number)
+        if issued_at is None:
+            issued_at = datetime.now()
+        full_path = os.path.join(receipts_folder, filename)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
         
-        item_count = 0
-        for item in items:
-            item_count += 1
-            # Alternate row colors
+        c = InvoiceCanvas(full_path, pagesize=letter)
+        width, height = letter
+        row_height = ReceiptGenerator.ROW_HEIGHT
+        
+        page_number = 1
+        text = ReceiptGenerator.start_page(c, receipt_number, issued_at, page_number, use_template)
+        y_position = ReceiptGenerator.FIRST_ROW_Y
+        running_total = 0
+        
+        for item_count, item in enumerate(items, 1):
+            if y_position < ReceiptGenerator.LAST_ROW_Y:
+                # Page full: carry the subtotal over to a new page
+                ReceiptGenerator.subtotal_line(text, y_position - 0.1*inch, "Carried forward:", running_total)
+                c.drawText(text)
+                c.showPage()
+                page_number += 1
+                text = ReceiptGenerator.start_page(c, receipt_number, issued_at, page_number, use_template)
+                y_position = ReceiptGenerator.FIRST_ROW_Y
+                ReceiptGenerator.subtotal_line(text, y_position, "Brought forward:", running_total)
+                y_position -= row_height
+            
+            # Alternate row colors, the text is drawn over the shading
             if item_count % 2 == 0:
                 c.setFillColorRGB(0.95, 0.95, 0.95)
-                c.rect(0.75*inch, y_position - 0.05*inch, width - 1.5*inch, 0.25*inch, fill=True, stroke=False)
-            
-            c.setFillColorRGB(0, 0, 0)
-            c.drawString(1*inch, y_position, item['name'][:30])
-            c.drawString(3.65*inch, y_position, str(item['quantity']))
-            c.drawString(4.5*inch, y_position, f"UGX {item['price']:,.0f}")
-            c.drawString(5.7*inch, y_position, f"UGX {item['subtotal']:,.0f}")
-            y_position -= 0.25*inch
-        
-        # Total Section
+                c.rect(0.75*inch, y_position - 0.05*inch, width - 1.5*inch, row_height, fill=True, stroke=False)
+            for x, value in ((1*inch, item['name'][:30]),
+                             (3.65*inch, str(item['quantity'])),
+                             (4.5*inch, f"UGX {item['price']:,.0f}"),
+                             (5.7*inch, f"UGX {item['subtotal']:,.0f}")):
+                text.setTextOrigin(x, y_position)
+                text.textOut(value)
+            running_total += item['subtotal']
+            y_position -= row_height
+        
+        # Total Section, on a new page if it would run into the footer
+        if y_position - 0.6*inch < ReceiptGenerator.TOTAL_BOTTOM_Y:
+            ReceiptGenerator.subtotal_line(text, y_position - 0.1*inch, "Carried forward:", running_total)
+            c.drawText(text)
+            c.showPage()
+            page_number += 1
+            text = ReceiptGenerator.start_page(c, receipt_number, issued_at, page_number, use_template)
+            y_position = ReceiptGenerator.FIRST_ROW_Y
+        
         y_position -= 0.3*inch
+        total_y = y_position - 0.3*inch
+        text.setFont("Helvetica-Bold", 14)
+        text.setTextOrigin(4.5*inch, total_y)
+        text.textOut("TOTAL:")
+        text.setFillColorRGB(0.15, 0.68, 0.38)  # Green
+        text.setTextOrigin(5.7*inch, total_y)
+        text.textOut(f"UGX {total:,.0f}")
+        c.drawText(text)
+        
         c.setLineWidth(1)
         c.setStrokeColorRGB(0, 0, 0)
         c.line(4.5*inch, y_position, 7*inch, y_position)
+        c.showPage()
         
-        y_position -= 0.3*inch
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(4.5*inch, y_position, "TOTAL:")
-        c.setFillColorRGB(0.15, 0.68, 0.38)  # Green
-        c.drawString(5.7*inch, y_position, f"UGX {total:,.0f}")
-        
-        # Footer
-        c.setFillColorRGB(0, 0, 0)
-        c.setFont("Helvetica-Italic", 9)
-        c.drawString(1*inch, 1.2*inch, "Thank you for shopping with us!")
+        # Now the page count is known
+        c.beginForm(ReceiptGenerator.PAGE_COUNT_FORM)
         c.setFont("Helvetica", 8)
-        c.drawString(1*inch, 1*inch, "For inquiries: contact@jksboutique.com | +256-XXX-XXXXXX")
-        c.drawString(1*inch, 0.8*inch, "This is a computer-generated invoice.")
+        c.drawString(0, 0, str(page_number))
+        c.endForm(hasImages=0)
         
         c.save()
         return full_path
@@ -424,6 +1615,477 @@ class ReceiptGenerator:
             return False
 
 
+class InvoiceRenderQueue:
+    """Renders invoice PDFs on a background thread pool so the till never waits on reportlab
+    
+    A failed render is tried again up to max_attempts times, then parked in
+    failed until retry_failed() is called. Every finished job, rendered or
+    given up, is put on the results queue for the UI to collect with after().
+    """
+    def __init__(self, max_workers=1, max_attempts=3, receipts_folder=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='InvoiceRender')
+        self.max_attempts = max_attempts
+        self.receipts_folder = receipts_folder
+        self.results = queue.Queue()
+        self.failed = []
+        self.pending = 0
+        self.lock = threading.Lock()
+    
+    def submit(self, items, total, receipt_number, filename):
+        """Queue an invoice for rendering, returns the job dictionary"""
+        job = {
+            'items': [dict(item) for item in items],  # the cart is cleared right after checkout
+            'total': total,
+            'receipt_number': receipt_number,
+            'filename': filename,
+            'attempts': 0,
+            'path': None,
+            'error': None,
+        }
+        with self.lock:
+            self.pending += 1
+        self._start(job)
+        return job
+    
+    def _start(self, job):
+        job['attempts'] += 1
+        try:
+            future = self.executor.submit(ReceiptGenerator.generate_receipt, job['items'], job['total'],
+                                          job['receipt_number'], job['filename'], self.receipts_folder)
+        except RuntimeError as e:  # pool already shut down
+            self._give_up(job, e)
+            return
+        future.add_done_callback(lambda f: self._finished(job, f))
+    
+    def _finished(self, job, future):
+        """Render thread: record the outcome or try the job again"""
+        try:
+            job['path'] = future.result()
+            job['error'] = None
+        except Exception as e:
+            if job['attempts'] < self.max_attempts:
+                self._start(job)
+            else:
+                self._give_up(job, e)
+            return
+        self._report(job)
+    
+    def _give_up(self, job, error):
+        job['error'] = error
+        with self.lock:
+            self.failed.append(job)
+        self._report(job)
+    
+    def _report(self, job):
+        # Put the job on results before it stops counting as pending,
+        # collect() relies on that order
+        self.results.put(job)
+        with self.lock:
+            self.pending -= 1
+    
+    def collect(self):
+        """Return the jobs finished since the last call and whether renders are still pending"""
+        still_pending = self.pending > 0
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished, still_pending
+    
+    def retry_failed(self):
+        """Queue every parked job again, returns how many were retried"""
+        with self.lock:
+            jobs, self.failed = self.failed, []
+            self.pending += len(jobs)
+        for job in jobs:
+            job['attempts'] = 0
+            self._start(job)
+        return len(jobs)
+    
+    def shutdown(self, wait=True):
+        """Stop taking jobs, by default after the queued renders finish"""
+        self.executor.shutdown(wait=wait)
+
+
+class InvoiceArchive:
+    """Month-sharded invoice storage with zip bundles for closed months
+    
+    Live invoices are written to receipts/YYYY/MM/. Once a month is over,
+    archive_closed_months() packs its folder into receipts/archive/YYYY-MM.zip
+    and records the bundle in receipts/archive/index.json. locate() finds an
+    invoice wherever it is now: in its shard, in the old flat receipts/
+    folder, or inside a bundle (extracted on demand).
+    """
+    SHARD_PATTERN = re.compile(r'^(\d{4})/(\d{2})/')
+    LEGACY_PATTERN = re.compile(r'^invoice_\d+_(\d{4})(\d{2})\d{2}_\d{6}\.pdf$')
+    
+    def __init__(self, receipts_folder=None):
+        self.receipts_folder = receipts_folder or ReceiptGenerator.get_receipts_folder()
+        self.archive_folder = os.path.join(self.receipts_folder, 'archive')
+        self.extract_folder = os.path.join(self.archive_folder, 'extracted')
+        self.index_path = os.path.join(self.archive_folder, 'index.json')
+        self.lock = threading.Lock()
+    
+    def shard_of(self, filename):
+        """'YYYY/MM' for an invoice filename, None if it carries no date"""
+        filename = filename.replace('\\', '/')
+        match = self.SHARD_PATTERN.match(filename) or self.LEGACY_PATTERN.match(os.path.basename(filename))
+        return f"{match.group(1)}/{match.group(2)}" if match else None
+    
+    def sharded_name(self, filename):
+        """The 'YYYY/MM/name' a flat legacy filename is stored under after sharding"""
+        filename = filename.replace('\\', '/')
+        shard = self.shard_of(filename)
+        if shard is None or self.SHARD_PATTERN.match(filename):
+            return filename
+        return f"{shard}/{os.path.basename(filename)}"
+    
+    def bundle_path(self, shard):
+        return os.path.join(self.archive_folder, shard.replace('/', '-') + '.zip')
+    
+    def locate(self, filename, on_extract=None):
+        """Full path of a stored invoice, extracting it from its bundle if needed
+        
+        Returns None if the invoice is nowhere to be found. on_extract is
+        called with the path when the invoice had to be extracted.
+        """
+        direct = os.path.join(self.receipts_folder, filename)
+        if os.path.exists(direct):
+            return direct
+        
+        name = self.sharded_name(filename)
+        sharded = os.path.join(self.receipts_folder, name)
+        if os.path.exists(sharded):
+            return sharded
+        
+        shard = self.shard_of(name)
+        if shard is None:
+            return None
+        extracted = os.path.join(self.extract_folder, name)
+        if os.path.exists(extracted):
+            return extracted
+        with self.lock:
+            bundle = self.bundle_path(shard)
+            if not os.path.exists(bundle):
+                return None
+            with zipfile.ZipFile(bundle) as archive:
+                if name not in archive.namelist():
+                    return None
+                os.makedirs(os.path.dirname(extracted), exist_ok=True)
+                temp_path = extracted + '.part'
+                with archive.open(name) as source, open(temp_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.replace(temp_path, extracted)
+        if on_extract is not None:
+            on_extract(extracted)
+        return extracted
+    
+    def shard_legacy_invoices(self):
+        """Move invoices from the flat receipts/ folder into their month shards"""
+        moved = 0
+        for entry in os.scandir(self.receipts_folder):
+            if not entry.is_file() or not self.LEGACY_PATTERN.match(entry.name):
+                continue
+            target = os.path.join(self.receipts_folder, self.sharded_name(entry.name))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(entry.path, target)
+            moved += 1
+        return moved
+    
+    def closed_months(self, today=None):
+        """Shards ('YYYY/MM') before the current month that still hold PDF files"""
+        current = (today or datetime.now()).strftime('%Y/%m')
+        shards = []
+        for year in os.scandir(self.receipts_folder):
+            if not (year.is_dir() and year.name.isdigit() and len(year.name) == 4):
+                continue
+            for month in os.scandir(year.path):
+                shard = f"{year.name}/{month.name}"
+                if month.is_dir() and self.SHARD_PATTERN.match(shard + '/') and shard < current:
+                    shards.append(shard)
+        return sorted(shards)
+    
+    def archive_month(self, shard):
+        """Pack one month's invoices into its bundle and remove the loose files
+        
+        Files already in the bundle are kept, so late invoices for an archived
+        month are added the next time round. Returns the number of files added.
+        """
+        month_folder = os.path.join(self.receipts_folder, *shard.split('/'))
+        names = sorted(entry.name for entry in os.scandir(month_folder)
+                       if entry.is_file() and entry.name.endswith('.pdf'))
+        if not names:
+            return 0
+        
+        os.makedirs(self.archive_folder, exist_ok=True)
+        bundle = self.bundle_path(shard)
+        temp_bundle = bundle + '.part'
+        archived = []
+        with self.lock:
+            try:
+                with zipfile.ZipFile(temp_bundle, 'w', zipfile.ZIP_DEFLATED) as target:
+                    for name in names:
+                        try:
+                            target.write(os.path.join(month_folder, name), f"{shard}/{name}")
+                        except OSError:
+                            continue  # evicted by InvoiceCache since the folder was listed
+                        archived.append(name)
+                    if os.path.exists(bundle):
+                        with zipfile.ZipFile(bundle) as existing:
+                            for info in existing.infolist():
+                                if info.filename.rsplit('/', 1)[-1] not in archived:
+                                    target.writestr(info, existing.read(info))
+                    count = len(target.namelist())
+                if archived:
+                    os.replace(temp_bundle, bundle)
+                    self.update_index(shard, bundle, count)
+            finally:
+                if os.path.exists(temp_bundle):
+                    os.remove(temp_bundle)
+        
+        # Only delete what is safely in the bundle
+        for name in archived:
+            try:
+                os.remove(os.path.join(month_folder, name))
+            except FileNotFoundError:
+                pass
+        if not os.listdir(month_folder):
+            os.rmdir(month_folder)
+        return len(archived)
+    
+    def remove_partial_bundles(self):
+        """Delete YYYY-MM.zip.part files left behind by an archive run that was cut short"""
+        if not os.path.isdir(self.archive_folder):
+            return
+        with self.lock:
+            for entry in os.scandir(self.archive_folder):
+                if entry.is_file() and entry.name.endswith('.zip.part'):
+                    os.remove(entry.path)
+    
+    def update_index(self, shard, bundle, count):
+        """Record a bundle in index.json"""
+        index = self.read_index()
+        index[shard] = {
+            'bundle': os.path.basename(bundle),
+            'invoices': count,
+            'bytes': os.path.getsize(bundle),
+            'archived_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        temp_path = self.index_path + '.part'
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+    
+    def read_index(self):
+        """{shard: bundle details} for every archived month"""
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, 'r') as f:
+            return json.load(f)
+    
+    def archive_closed_months(self, today=None):
+        """Shard legacy files and bundle every closed month, returns files archived"""
+        self.remove_partial_bundles()
+        self.shard_legacy_invoices()
+        return sum(self.archive_month(shard) for shard in self.closed_months(today))
+
+
+class InvoiceCache:
+    """Treats the invoice PDFs on disk as a cache of the receipts tables
+    
+    get_invoice() returns a PDF for any recorded sale: the stored file if it
+    is still around (loose or in a monthly bundle), otherwise the invoice is
+    rendered again from receipts/receipt_items. Loose PDFs under receipts/
+    are kept under max_bytes by deleting the least recently opened ones;
+    opening a file touches its mtime, which is the LRU order. Monthly
+    bundles and the reprints folder are not part of the cache.
+    """
+    DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+    EXCLUDED_FOLDERS = ('reprints',)
+    
+    def __init__(self, archive=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.archive = archive or InvoiceArchive()
+        self.receipts_folder = self.archive.receipts_folder
+        self.max_bytes = max_bytes
+        self.usage = None  # bytes of cached PDFs, known after the first evict()
+        self.evicting = False
+        self.lock = threading.Lock()
+    
+    def get_invoice(self, db, receipt_id, filename):
+        """Path of the invoice PDF for a receipt, rendered if needed; None for an unknown receipt
+        
+        Rendering needs the database, so call this from the database worker.
+        """
+        path = self.archive.locate(filename, on_extract=self.track)
+        if path is not None:
+            os.utime(path)  # most recently used
+            return path
+        
+        receipt = db.get_receipt_with_items(receipt_id)
+        if receipt is None:
+            return None
+        receipt_id, receipt_number, total, stored_filename, created_at, items = receipt
+        name = self.archive.sharded_name(stored_filename)
+        # Next to the invoices extracted from bundles, where locate() looks:
+        # a file in its month folder would make the next archive_month()
+        # rewrite the whole bundle of a month that is usually closed
+        folder = self.archive.extract_folder if self.archive.shard_of(name) else self.receipts_folder
+        path = ReceiptGenerator.generate_receipt(items, total, receipt_number, name,
+                                                 folder, parse_created_at(created_at))
+        self.track(path)
+        return path
+    
+    def track(self, path):
+        """Count a newly written PDF, evicting on a background thread when over budget"""
+        with self.lock:
+            if self.usage is None:
+                return
+            self.usage += os.path.getsize(path)
+            if self.usage <= self.max_bytes or self.evicting:
+                return
+            self.evicting = True
+        threading.Thread(target=self.evict, name='InvoiceCacheEviction', daemon=True).start()
+    
+    def cached_files(self):
+        """(mtime, size, path) for every cached PDF, least recently used first"""
+        files = []
+        for folder, subfolders, names in os.walk(self.receipts_folder):
+            if folder == self.receipts_folder:
+                subfolders[:] = [name for name in subfolders if name not in self.EXCLUDED_FOLDERS]
+            for name in names:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        return files
+    
+    def evict(self, target_bytes=None):
+        """Delete least recently used PDFs until the cache fits, returns how many were removed
+        
+        Eviction goes down to 90% of max_bytes so it doesn't run on every new invoice.
+        """
+        target = self.max_bytes * 0.9 if target_bytes is None else target_bytes
+        files = self.cached_files()
+        usage = sum(size for mtime, size, path in files)
+        removed = 0
+        for mtime, size, path in files:
+            if usage <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            usage -= size
+            removed += 1
+        with self.lock:
+            self.usage = usage
+            self.evicting = False
+        return removed
+    
+    def start_background_maintenance(self):
+        """Bundle closed months, then trim the cache, on a daemon thread; failures are only logged"""
+        def run():
+            try:
+                archived = self.archive.archive_closed_months()
+                if archived:
+                    print(f"Archived {archived} invoices into monthly bundles")
+                self.evict()
+            except Exception as e:
+                print(f"Invoice maintenance failed: {e}")
+        thread = threading.Thread(target=run, name='InvoiceMaintenance', daemon=True)
+        thread.start()
+        return thread
+
+
+class InfiniteScroll:
+    """Load a Treeview page by page as the user scrolls towards the end
+    
+    fetch_page(db, after, limit) runs on the database worker and returns up
+    to limit rows following the key after (None for the first page);
+    key_of(row) gives the key of a row and insert_row(row) adds it to the
+    tree. The next page is requested once the bottom of the view passes
+    prefetch (a fraction of the loaded rows), and pages keep coming until
+    the tree fills the view or the rows run out. To run another query, set
+    fetch_page and call reset().
+    """
+    def __init__(self, controller, tree, scrollbar, fetch_page, key_of, insert_row,
+                 page_size=100, prefetch=0.9):
+        self.controller = controller
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.key_of = key_of
+        self.insert_row = insert_row
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.generation = 0
+        self.after_key = None
+        self.loading = False
+        self.exhausted = False
+        tree.configure(yscrollcommand=self.on_scroll)
+        scrollbar.config(command=tree.yview)
+    
+    def on_scroll(self, first, last):
+        """yscrollcommand: move the scrollbar and fetch ahead of the user"""
+        self.scrollbar.set(first, last)
+        if float(last) >= self.prefetch:
+            self.load_more()
+    
+    def reset(self):
+        """Clear the tree and start again from the first page, e.g. after the filters change"""
+        self.generation += 1  # pages still on their way belong to the old query
+        self.tree.delete(*self.tree.get_children())
+        self.after_key = None
+        self.loading = False
+        self.exhausted = False
+        self.load_more()
+    
+    def load_more(self):
+        """Request the next page unless one is already on its way"""
+        if self.loading or self.exhausted:
+            return
+        self.loading = True
+        generation, after_key, limit = self.generation, self.after_key, self.page_size
+        fetch_page = self.fetch_page
+        self.controller.run_db(lambda db: fetch_page(db, after_key, limit),
+                               on_done=lambda rows: self.page_loaded(generation, rows),
+                               on_error=lambda e: self.page_failed(generation, e))
+    
+    def page_loaded(self, generation, rows):
+        if generation != self.generation or not self.tree.winfo_exists():
+            return
+        for row in rows:
+            self.insert_row(row)
+        if rows:
+            self.after_key = self.key_of(rows[-1])
+        self.exhausted = len(rows) < self.page_size
+        self.loading = False
+        # A page that doesn't fill the view never scrolls, so check once it is drawn
+        self.tree.after_idle(self.fill_view)
+    
+    def stop(self):
+        """Stop loading pages, e.g. while the tree shows rows from somewhere else"""
+        self.generation += 1
+        self.loading = False
+        self.exhausted = True
+    
+    def page_failed(self, generation, error):
+        if generation != self.generation:
+            return
+        self.loading = False
+        messagebox.showerror("Error", f"Could not load more rows:\n{str(error)}")
+    
+    def fill_view(self):
+        if self.tree.winfo_exists() and self.tree.yview()[1] >= self.prefetch:
+            self.load_more()
+
+
 class RegistrationPage(tk.Frame):
     """Registration page for new users - with scrolling support"""
     def __init__(self, parent, controller):
@@ -538,29 +2200,33 @@ class RegistrationPage(tk.Frame):
             messagebox.showerror("Error", "Please enter a valid email address!")
             return
           # Check if username already exists
-        if self.controller.data_manager.username_exists(username):
-            messagebox.showerror("Error", "Username already exists! Please choose another.")
-            return
+        def registered(result):
+            if result == 'exists':
+                messagebox.showerror("Error", "Username already exists! Please choose another.")
+                return
+            if not result:
+                messagebox.showerror("Error", "Failed to register user. Please try again.")
+                return
+            
+            messagebox.showinfo("Success", f"Account created successfully!\nWelcome, {full_name}!")
+            
+            # Clear fields
+            self.fullname_entry.delete(0, tk.END)
+            self.email_entry.delete(0, tk.END)
+            self.username_entry.delete(0, tk.END)
+            self.password_entry.delete(0, tk.END)
+            self.confirm_password_entry.delete(0, tk.END)
+            
+            # Go to login page
+            self.controller.show_frame("LoginPage")
         
         # Register user
         user = User(username, password, full_name, email)
-        success = self.controller.data_manager.register_user(user)
-        
-        if not success:
-            messagebox.showerror("Error", "Failed to register user. Please try again.")
-            return
-        
-        messagebox.showinfo("Success", f"Account created successfully!\nWelcome, {full_name}!")
-        
-        # Clear fields
-        self.fullname_entry.delete(0, tk.END)
-        self.email_entry.delete(0, tk.END)
-        self.username_entry.delete(0, tk.END)
-        self.password_entry.delete(0, tk.END)
-        self.confirm_password_entry.delete(0, tk.END)
-        
-        # Go to login page
-        self.controller.show_frame("LoginPage")
+        self.controller.run_db(
+            lambda db: 'exists' if db.username_exists(user.username)
+            else db.register_user(user.username, user.password, user.full_name, user.email),
+            on_done=registered
+        )
 
 
 class LoginPage(tk.Frame):
@@ -624,11 +2290,13 @@ class LoginPage(tk.Frame):
             return
         
         # Check registered users
-        user = self.controller.data_manager.get_user(username)
-        if user and user.password == password:
-            self.controller.show_frame("DashboardPage")
-        else:
-            messagebox.showerror("Error", "Invalid username or password!")
+        def check_user(user_data):
+            if user_data and user_data[1] == password:
+                self.controller.show_frame("DashboardPage")
+            else:
+                messagebox.showerror("Error", "Invalid username or password!")
+        
+        self.controller.run_db('get_user', username, on_done=check_user)
 
 
 class DashboardPage(tk.Frame):
@@ -691,11 +2359,10 @@ class DashboardPage(tk.Frame):
         return value_label
     
     def update_stats(self):
-        db = self.controller.data_manager.db
-        
-        total_products = len(db.get_all_products())
-        total_value = db.get_total_inventory_value()
-        low_stock = db.get_low_stock_count()
+        self.controller.run_db('get_inventory_summary', on_done=self.show_stats)
+    
+    def show_stats(self, summary):
+        total_products, total_value, low_stock = summary
         
         self.total_products_label.config(text=str(total_products))
         self.total_value_label.config(text=f"UGX {total_value:,.0f}")
@@ -725,7 +2392,7 @@ class AddStockPage(tk.Frame):
         
         # Form
         form_frame = tk.Frame(self, bg='white', bd=2, relief='raised')
-        form_frame.place(relx=0.5, rely=0.5, anchor='center', width=500, height=400)
+        form_frame.place(relx=0.5, rely=0.5, anchor='center', width=500, height=470)
         
         tk.Label(form_frame, text="Product Details", font=('Arial', 16, 'bold'),
                 bg='white', fg='#2c3e50').pack(pady=20)
@@ -748,6 +2415,12 @@ class AddStockPage(tk.Frame):
         self.quantity_entry = tk.Entry(form_frame, font=('Arial', 11), width=40)
         self.quantity_entry.pack(pady=5)
         
+        # SKU / barcode
+        tk.Label(form_frame, text="SKU / Barcode (optional, scan it here):", font=('Arial', 11),
+                bg='white', fg='#2c3e50').pack(pady=(10, 5))
+        self.sku_entry = tk.Entry(form_frame, font=('Arial', 11), width=40)
+        self.sku_entry.pack(pady=5)
+        
         # Add button
         add_btn = tk.Button(form_frame, text="Add Product", font=('Arial', 12, 'bold'),
                            bg='#27ae60', fg='white', width=20, height=2,
@@ -755,42 +2428,48 @@ class AddStockPage(tk.Frame):
         add_btn.pack(pady=20)
     
     def add_product(self):
-        name = self.name_entry.get().strip()
-        price_str = self.price_entry.get().strip()
-        quantity_str = self.quantity_entry.get().strip()
-        
-        if not name or not price_str or not quantity_str:
-            messagebox.showerror("Error", "All fields are required!")
+        try:
+            name, price, quantity = validate_product_fields(
+                self.name_entry.get(), self.price_entry.get(), self.quantity_entry.get()
+            )
+            sku = normalize_sku(self.sku_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
         
-        try:
-            price = float(price_str)
-            quantity = int(quantity_str)
-            
-            if price <= 0 or quantity <= 0:
-                messagebox.showerror("Error", "Price and quantity must be positive!")
-                return
-            
-            product_id = self.controller.data_manager.get_next_id()
-            product = Product(product_id, name, price, quantity)
-            self.controller.data_manager.add_product(product)
-            
-            messagebox.showinfo("Success", f"Product '{name}' added successfully!")
+        # The database assigns the ID, no need to look it up first
+        product = Product(None, name, price, quantity, sku)
+        
+        def added(product_id):
+            product.product_id = product_id
+            messagebox.showinfo("Success", f"Product '{name}' added successfully! (ID: {product_id})")
             
             # Clear fields
             self.name_entry.delete(0, tk.END)
             self.price_entry.delete(0, tk.END)
             self.quantity_entry.delete(0, tk.END)
-            
-        except ValueError:
-            messagebox.showerror("Error", "Invalid price or quantity format!")
+            self.sku_entry.delete(0, tk.END)
+        
+        def failed(error):
+            if isinstance(error, sqlite3.IntegrityError):
+                messagebox.showerror("Error", f"SKU/barcode '{sku}' is already used by another product!")
+            else:
+                messagebox.showerror("Database Error", f"Database operation failed:\n{str(error)}")
+        
+        self.controller.run_db('add_product', product.name, product.price, product.quantity, product.sku,
+                               on_done=added, on_error=failed)
 
 
 class InventoryPage(tk.Frame):
     """Page for viewing and managing inventory"""
+    PAGE_SIZE = 200  # products fetched per scroll step, a few screens' worth
+    
     def __init__(self, parent, controller):
         tk.Frame.__init__(self, parent, bg='#ecf0f1')
         self.controller = controller
+        self.product_items = {}  # product_id -> Treeview item of the loaded rows
+        self.product_ids = []  # the same product_ids, sorted, to place new rows
+        self.change_cursor = None  # get_product_changes cursor of the last refresh
         
         # Header
         header = tk.Frame(self, bg='#2c3e50', height=80)
@@ -821,9 +2500,8 @@ class InventoryPage(tk.Frame):
         
         # Create treeview
         self.tree = ttk.Treeview(tree_frame, columns=('ID', 'Name', 'Price', 'Quantity', 'Total Value'),
-                                show='headings', yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+                                show='headings', xscrollcommand=x_scroll.set)
         
-        y_scroll.config(command=self.tree.yview)
         x_scroll.config(command=self.tree.xview)
         
         # Define columns
@@ -841,36 +2519,99 @@ class InventoryPage(tk.Frame):
         
         self.tree.pack(fill='both', expand=True, padx=10, pady=10)
         
+        # Only the rows scrolled into view (plus a page ahead) are fetched and
+        # inserted, so the page opens as fast with 100,000 products as with 100
+        self.pager = InfiniteScroll(controller, self.tree, y_scroll,
+                                    lambda db, after_id, limit: db.get_product_page(after_id or 0, limit),
+                                    key_of=lambda product: product[0],
+                                    insert_row=self.insert_product,
+                                    page_size=self.PAGE_SIZE)
+        
         # Buttons
         btn_frame = tk.Frame(content, bg='#ecf0f1')
         btn_frame.pack(fill='x', pady=10)
         
         refresh_btn = tk.Button(btn_frame, text="Refresh", font=('Arial', 11),
                                bg='#3498db', fg='white', width=12,
-                               command=self.load_inventory)
+                               command=self.reload_inventory)
         refresh_btn.pack(side='left', padx=5)
         
         delete_btn = tk.Button(btn_frame, text="Delete Selected", font=('Arial', 11),
                               bg='#e74c3c', fg='white', width=12,
                               command=self.delete_product)
         delete_btn.pack(side='left', padx=5)
+        
+        self.count_label = tk.Label(btn_frame, text="", font=('Arial', 11), bg='#ecf0f1', fg='#7f8c8d')
+        self.count_label.pack(side='right', padx=5)
     
     def load_inventory(self):
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Load products
-        products = self.controller.data_manager.get_all_products()
-        for product in products:
-            total_value = product.price * product.quantity
-            self.tree.insert('', 'end', values=(
-                product.product_id,
-                product.name,
-                f"{product.price:,.0f}",
-                product.quantity,
-                f"{total_value:,.0f}"
-            ))
+        """Show the inventory, applying only what changed if it is already loaded"""
+        if self.change_cursor is None:
+            self.reload_inventory()
+        else:
+            self.refresh_inventory()
+    
+    def reload_inventory(self):
+        """Clear the list and load it again from the first page"""
+        self.controller.run_db('get_product_changes', on_done=self.apply_changes)
+        self.product_items.clear()
+        self.product_ids.clear()
+        self.pager.reset()
+        self.update_count()
+    
+    def refresh_inventory(self):
+        """Apply the inserts, updates and deletes made since the last refresh"""
+        self.controller.run_db('get_product_changes', self.change_cursor, on_done=self.apply_changes)
+        self.update_count()
+    
+    def update_count(self):
+        self.controller.run_db('get_product_count',
+                               on_done=lambda count: self.count_label.config(text=f"{count:,} products"))
+    
+    def apply_changes(self, changes):
+        if changes is None:
+            # Changes since the last refresh were pruned
+            self.reload_inventory()
+            return
+        changed, deleted, self.change_cursor = changes
+        for product_id in deleted:
+            item = self.product_items.pop(product_id, None)
+            if item is not None:
+                self.tree.delete(item)
+                del self.product_ids[bisect.bisect_left(self.product_ids, product_id)]
+        
+        loaded_up_to = self.pager.after_key or 0
+        for product in changed:
+            product_id = product[0]
+            if product_id in self.product_items:
+                self.tree.item(self.product_items[product_id], values=self.product_values(product))
+            elif product_id < loaded_up_to or self.pager.exhausted:
+                # A new product inside the loaded range; ones beyond it come with a later page
+                self.insert_product(product, bisect.bisect(self.product_ids, product_id))
+    
+    @staticmethod
+    def product_values(product):
+        product_id, name, price, quantity = product
+        total_value = price * quantity
+        return (
+            product_id,
+            name,
+            f"{price:,.0f}",
+            quantity,
+            f"{total_value:,.0f}"
+        )
+    
+    def insert_product(self, product, position='end'):
+        product_id = product[0]
+        if product_id in self.product_items:
+            # Already added by a refresh while this page was being fetched
+            self.tree.item(self.product_items[product_id], values=self.product_values(product))
+            return
+        self.product_items[product_id] = self.tree.insert('', position, values=self.product_values(product))
+        if self.product_ids and product_id < self.product_ids[-1]:
+            bisect.insort(self.product_ids, product_id)
+        else:
+            self.product_ids.append(product_id)
     
     def delete_product(self):
         selection = self.tree.selection()
@@ -883,17 +2624,28 @@ class InventoryPage(tk.Frame):
         product_name = item['values'][1]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{product_name}'?"):
-            self.controller.data_manager.delete_product(product_id)
-            self.load_inventory()
-            messagebox.showinfo("Success", "Product deleted successfully!")
+            def deleted(_):
+                self.refresh_inventory()
+                messagebox.showinfo("Success", "Product deleted successfully!")
+            
+            self.controller.run_db('delete_product', product_id, on_done=deleted)
 
 
 class ReceiptPage(tk.Frame):
     """Page for generating receipts"""
+    SEARCH_LIMIT = 20  # products listed under the search box
+    SEARCH_DELAY = 150  # ms of no typing before the search runs
+    
     def __init__(self, parent, controller):
         tk.Frame.__init__(self, parent, bg='#ecf0f1')
         self.controller = controller
-        self.cart_items = []
+        self.cart = Cart()
+        self.last_invoice_path = None
+        self.render_poll_id = None
+        self.search_results = []  # product rows, in the order of the results list
+        self.search_after_id = None
+        self.search_generation = 0
+        self.checkout_pending = False  # a sale is being saved, see generate_receipt
         
         # Header
         header = tk.Frame(self, bg='#2c3e50', height=80)
@@ -918,11 +2670,23 @@ class ReceiptPage(tk.Frame):
         tk.Label(left_frame, text="Select Product", font=('Arial', 14, 'bold'),
                 bg='white').pack(pady=10)
         
-        tk.Label(left_frame, text="Product:", font=('Arial', 11), bg='white').pack(pady=(10, 5))
-        self.product_var = tk.StringVar()
-        self.product_combo = ttk.Combobox(left_frame, textvariable=self.product_var,
-                                         font=('Arial', 11), width=30, state='readonly')
-        self.product_combo.pack(pady=5)
+        # Barcode scanners type the code followed by Enter
+        tk.Label(left_frame, text="Scan barcode:", font=('Arial', 11), bg='white').pack(pady=(5, 5))
+        self.scan_entry = tk.Entry(left_frame, font=('Arial', 11), width=32)
+        self.scan_entry.pack(pady=5)
+        self.scan_entry.bind('<Return>', self.scan_barcode)
+        
+        tk.Label(left_frame, text="Search product:", font=('Arial', 11), bg='white').pack(pady=(10, 5))
+        self.search_entry = tk.Entry(left_frame, font=('Arial', 11), width=32)
+        self.search_entry.pack(pady=5)
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
+        self.search_entry.bind('<Down>', lambda e: self.results_listbox.focus_set())
+        
+        self.results_listbox = tk.Listbox(left_frame, font=('Arial', 10), width=40, height=8,
+                                          exportselection=False)
+        self.results_listbox.pack(padx=10, pady=5)
+        self.results_listbox.bind('<Double-1>', lambda e: self.qty_entry.focus_set())
+        self.results_listbox.bind('<Return>', lambda e: self.qty_entry.focus_set())
         
         tk.Label(left_frame, text="Quantity:", font=('Arial', 11), bg='white').pack(pady=(10, 5))
         self.qty_entry = tk.Entry(left_frame, font=('Arial', 11), width=32)
@@ -965,10 +2729,24 @@ class ReceiptPage(tk.Frame):
                              command=self.clear_cart)
         clear_btn.pack(side='left', padx=5)
         
-        generate_btn = tk.Button(btn_frame, text="📄 Generate Receipt", font=('Arial', 11, 'bold'),
-                                bg='#27ae60', fg='white', width=18, height=2,
-                                command=self.generate_receipt)
-        generate_btn.pack(side='left', padx=5)
+        self.generate_btn = tk.Button(btn_frame, text="📄 Generate Receipt", font=('Arial', 11, 'bold'),
+                                      bg='#27ae60', fg='white', width=18, height=2,
+                                      command=self.generate_receipt)
+        self.generate_btn.pack(side='left', padx=5)
+        
+        # Invoices render in the background, these act on the finished ones
+        invoice_frame = tk.Frame(right_frame, bg='white')
+        invoice_frame.pack()
+        
+        self.open_invoice_btn = tk.Button(invoice_frame, text="📂 Open Last Invoice", font=('Arial', 9),
+                                          bg='#3498db', fg='white', state='disabled',
+                                          command=self.open_last_invoice)
+        self.open_invoice_btn.pack(side='left', padx=5)
+        
+        self.retry_btn = tk.Button(invoice_frame, text="🔁 Retry Invoices (0)", font=('Arial', 9),
+                                   bg='#f39c12', fg='white', state='disabled',
+                                   command=self.retry_failed_invoices)
+        self.retry_btn.pack(side='left', padx=5)
         
         # Status label
         self.status_label = tk.Label(right_frame, text="Add items to cart and click Generate Receipt", 
@@ -976,135 +2754,224 @@ class ReceiptPage(tk.Frame):
         self.status_label.pack(pady=5)
     
     def load_products(self):
-        products = self.controller.data_manager.get_all_products()
-        product_names = [f"{p.name} (ID: {p.product_id}, Stock: {p.quantity})" for p in products]
-        self.product_combo['values'] = product_names
+        """Search again, so the results show the current stock"""
+        self.run_search()
+    
+    def schedule_search(self, event=None):
+        """Search once the cashier pauses typing"""
+        if event is not None and event.keysym in ('Down', 'Return', 'Tab'):
+            return
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(self.SEARCH_DELAY, self.run_search)
+    
+    def run_search(self):
+        self.search_after_id = None
+        self.search_generation += 1
+        generation = self.search_generation
+        self.controller.run_db('search_products', self.search_entry.get(), self.SEARCH_LIMIT,
+                               on_done=lambda products: self.show_search_results(generation, products))
+    
+    def show_search_results(self, generation, products):
+        if generation != self.search_generation:
+            return  # the cashier has typed more since
+        self.search_results = products
+        for product in self.cart.update_stock(Product(*row) for row in products):
+            self.show_status(f"Only {product.quantity} of {product.name} left in stock, "
+                             f"the cart holds {self.cart.quantities[product.product_id]}", error=True)
+        self.results_listbox.delete(0, tk.END)
+        for product_id, name, price, quantity in products:
+            self.results_listbox.insert(tk.END, f"{name} - UGX {price:,.0f} ({quantity} in stock)")
+        if products:
+            self.results_listbox.selection_set(0)
     
     def add_to_cart(self):
-        selection = self.product_var.get()
+        selection = self.results_listbox.curselection()
         if not selection:
-            messagebox.showwarning("Warning", "Please select a product!")
+            self.show_status("Select a product in the search results first", error=True)
             return
+        # The search result already holds the product row, no need to fetch it again
+        product = Product(*self.search_results[selection[0]])
         
-        try:            # Extract product ID from selection
-            product_id = int(selection.split("ID: ")[1].split(",")[0])
+        try:
             quantity = int(self.qty_entry.get())
-            
-            if quantity <= 0:
-                messagebox.showerror("Error", "Quantity must be positive!")
-                return
-            
-            product = self.controller.data_manager.get_product(product_id)
-            if not product:
-                messagebox.showerror("Error", "Product not found!")
-                return
-            
-            if quantity > product.quantity:
-                messagebox.showerror("Error", f"Only {product.quantity} items available in stock!")
-                return
-            
-            # Add to cart
-            item = {
-                'product_id': product_id,
-                'name': product.name,
-                'price': product.price,
-                'quantity': quantity,
-                'subtotal': product.price * quantity
-            }
-            self.cart_items.append(item)
-              # Update display
-            self.cart_listbox.insert(tk.END, 
-                f"{item['name']} x{quantity} - UGX {item['subtotal']:,.0f}")
-            
-            self.update_total()
+        except ValueError:
+            self.show_status("Enter the quantity as a whole number", error=True)
+            return
+        
+        if self.add_product_to_cart(product, quantity):
             self.qty_entry.delete(0, tk.END)
-            messagebox.showinfo("Added", f"{product.name} added to cart!")
-            
-        except ValueError as e:
-            messagebox.showerror("Error", f"Invalid quantity: {str(e)}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add to cart: {str(e)}")
+            self.search_entry.focus_set()
+    
+    def add_product_to_cart(self, product, quantity, sku=None):
+        """Reserve the units and show the line, returns True if they were added"""
+        try:
+            index = self.cart.add(product, quantity, sku)
+        except (ValueError, InsufficientStockError) as e:
+            self.show_status(str(e), error=True)
+            return False
+        
+        if self.cart_listbox.size() == len(self.cart):
+            self.cart_listbox.delete(index)  # an existing line, shown again with its new quantity
+        item = self.cart.line(product.product_id)
+        self.cart_listbox.insert(index, self.line_text(item))
+        
+        self.update_total()
+        self.show_status(f"✅ {product.name} x{item['quantity']} in cart "
+                         f"({self.cart.available(product.product_id)} more in stock)")
+        return True
+    
+    def scan_barcode(self, event=None):
+        """Add one unit of the scanned product; the entry is ready for the next scan at once"""
+        sku = self.scan_entry.get().strip()
+        self.scan_entry.delete(0, tk.END)
+        if not sku:
+            return
+        # Items already scanned into this cart are added without a lookup
+        product = self.cart.product_for_sku(sku)
+        if product is not None:
+            self.add_scanned_product(product, sku)
+            return
+        self.controller.run_db(
+            'get_product_by_sku', sku,
+            on_done=lambda row: self.add_scanned_product(Product(*row) if row else None, sku),
+            on_error=lambda e: self.show_status(f"Scan failed: {e}", error=True)
+        )
+    
+    def add_scanned_product(self, product, sku):
+        if product is None:
+            self.show_status(f"No product with barcode {sku}", error=True)
+            return
+        self.add_product_to_cart(product, 1, sku)
+    
+    def show_status(self, text, error=False):
+        """Feedback under the cart that doesn't stop the cashier, unlike a dialog"""
+        if error:
+            self.bell()
+            text = f"❌ {text}"
+        self.status_label.config(text=text, fg='#e74c3c' if error else '#27ae60')
     
     def clear_cart(self):
-        self.cart_items = []
+        self.cart.clear()
         self.cart_listbox.delete(0, tk.END)
         self.update_total()
     
+    def show_cart(self):
+        """Draw every cart line again"""
+        self.cart_listbox.delete(0, tk.END)
+        for item in self.cart.items():
+            self.cart_listbox.insert(tk.END, self.line_text(item))
+        self.update_total()
+    
+    @staticmethod
+    def line_text(item):
+        return f"{item['name']} x{item['quantity']} - UGX {item['subtotal']:,.0f}"
+    
     def update_total(self):
-        total = sum(item['subtotal'] for item in self.cart_items)
-        self.total_label.config(text=f"Total: UGX {total:,.0f}")
+        self.total_label.config(text=f"Total: UGX {self.cart.total:,.0f}")
     
     def generate_receipt(self):
-        """Generate PDF invoice for items in cart"""
-        print("DEBUG: generate_receipt called")  # Debug
-        print(f"DEBUG: Cart items count: {len(self.cart_items)}")  # Debug
-        
-        if not self.cart_items:
-            messagebox.showwarning("Warning", "Cart is empty! Please add items first.")
+        """Record the sale, then render its invoice PDF in the background"""
+        if self.checkout_pending:
+            return  # the button is disabled, this is a queued second click
+        if not self.cart:
+            self.show_status("Cart is empty! Please add items first.", error=True)
             return
         
-        try:
-            print("DEBUG: Getting database manager")  # Debug
-            db = self.controller.data_manager.db
-            receipt_number = db.get_next_receipt_number()
-            print(f"DEBUG: Receipt number: {receipt_number}")  # Debug
-            
-            total = sum(item['subtotal'] for item in self.cart_items)
-            print(f"DEBUG: Total: {total}")  # Debug
-            
-            print("DEBUG: Calling ReceiptGenerator.generate_receipt")  # Debug
-            full_path = ReceiptGenerator.generate_receipt(self.cart_items, total, receipt_number)
-            print(f"DEBUG: Invoice saved to: {full_path}")  # Debug
-            
-            # Save receipt to database
-            print("DEBUG: Saving to database")  # Debug
-            db.save_receipt(receipt_number, total, os.path.basename(full_path), self.cart_items)
-            
-            # Update inventory
-            print("DEBUG: Updating inventory")  # Debug
-            for item in self.cart_items:
-                product = self.controller.data_manager.get_product(item['product_id'])
-                if product:
-                    new_quantity = product.quantity - item['quantity']
-                    self.controller.data_manager.update_product(
-                        product.product_id, product.name, product.price, new_quantity
-                    )
-            
-            # Get receipts folder for display
-            receipts_folder = ReceiptGenerator.get_receipts_folder()
-            print("DEBUG: Showing success message")  # Debug
-            
-            # Ask if user wants to open the invoice
-            result = messagebox.askyesno("Invoice Generated!", 
-                              f"✅ Invoice generated successfully!\n\n"
-                              f"Invoice #: {receipt_number:05d}\n"
-                              f"Total: UGX {total:,.0f}\n\n"
-                              f"Saved to:\n{receipts_folder}\n\n"
-                              f"File: {os.path.basename(full_path)}\n\n"
-                              f"📥 Would you like to open the invoice now?")
-            
-            if result:
-                # Open the invoice
-                if ReceiptGenerator.open_receipt(full_path):
-                    print("DEBUG: Invoice opened successfully")
-                else:
-                    messagebox.showinfo("Info", f"Please open the invoice manually from:\n{full_path}")
-            
-            print("DEBUG: Clearing cart")  # Debug
-            self.clear_cart()
-            self.status_label.config(text="✅ Invoice generated successfully!", fg='#27ae60')
-            print("DEBUG: Invoice generation complete!")  # Debug
-            
-        except Exception as e:
-            print(f"DEBUG ERROR: {str(e)}")  # Debug
-            import traceback
-            traceback.print_exc()
-            self.status_label.config(text="❌ Failed to generate invoice", fg='#e74c3c')
-            messagebox.showerror("Error", f"Failed to generate invoice!\n\nError: {str(e)}\n\nPlease check that:\n1. Cart has items\n2. Products exist in database\n3. Write permissions available")
+        # The button stays disabled until the sale is saved or fails, so one
+        # cart can't be sold twice; items scanned meanwhile stay in the cart
+        cart = self.cart.items()
+        total = self.cart.total
+        self.set_checkout_pending(True)
+        self.status_label.config(text="⏳ Saving sale...", fg='#7f8c8d')
+        
+        # Save receipt, items and stock decrement in one transaction
+        self.controller.run_db(
+            'checkout', cart, ReceiptGenerator.build_filename,
+            on_done=lambda result: self.sale_recorded(result, cart, total),
+            on_error=self.sale_failed
+        )
+    
+    def sale_recorded(self, result, cart, total):
+        """The sale is committed: free the till and queue the invoice"""
+        receipt_id, receipt_number, filename = result
+        self.set_checkout_pending(False)
+        self.controller.invoice_renderer.submit(cart, total, receipt_number, filename)
+        
+        # The cashier can start the next customer while the PDF renders
+        self.cart.remove_sold(cart)
+        self.show_cart()
+        self.load_products()
+        self.status_label.config(text=f"✅ Sale #{receipt_number:05d} saved (UGX {total:,.0f}) - rendering invoice...",
+                                 fg='#27ae60')
+        self.watch_renders()
+    
+    def sale_failed(self, error):
+        self.set_checkout_pending(False)
+        if isinstance(error, InsufficientStockError):
+            self.status_label.config(text="❌ Not enough stock", fg='#e74c3c')
+            messagebox.showerror("Insufficient Stock", f"{error}\n\nNo sale was recorded. Please adjust the cart.")
+            self.load_products()
+        else:
+            self.status_label.config(text="❌ Failed to save sale", fg='#e74c3c')
+            messagebox.showerror("Error", f"Failed to save sale!\n\nError: {str(error)}\n\nNo sale was recorded.")
+    
+    def set_checkout_pending(self, pending):
+        self.checkout_pending = pending
+        self.generate_btn.config(state='disabled' if pending else 'normal')
+    
+    def watch_renders(self):
+        """Poll the invoice render queue and report finished invoices"""
+        if self.render_poll_id is None:
+            self.render_poll_id = self.after(100, self.check_renders)
+    
+    def check_renders(self):
+        self.render_poll_id = None
+        renderer = self.controller.invoice_renderer
+        finished, still_pending = renderer.collect()
+        
+        for job in finished:
+            if job['error'] is None:
+                self.last_invoice_path = job['path']
+                self.controller.invoice_cache.track(job['path'])
+                self.open_invoice_btn.config(state='normal')
+                self.status_label.config(text=f"✅ Invoice #{job['receipt_number']:05d} ready: "
+                                              f"{os.path.basename(job['path'])}", fg='#27ae60')
+            else:
+                print(f"Invoice #{job['receipt_number']} failed to render: {job['error']}")
+                self.status_label.config(text=f"❌ Invoice #{job['receipt_number']:05d} failed to render "
+                                              f"(sale is saved) - use Retry Invoices", fg='#e74c3c')
+        
+        failures = len(renderer.failed)
+        self.retry_btn.config(text=f"🔁 Retry Invoices ({failures})",
+                              state='normal' if failures else 'disabled')
+        if still_pending:
+            self.watch_renders()
+    
+    def retry_failed_invoices(self):
+        retried = self.controller.invoice_renderer.retry_failed()
+        if retried:
+            self.status_label.config(text=f"⏳ Rendering {retried} invoice(s) again...", fg='#7f8c8d')
+            self.retry_btn.config(text="🔁 Retry Invoices (0)", state='disabled')
+            self.watch_renders()
+    
+    def open_last_invoice(self):
+        if self.last_invoice_path and not ReceiptGenerator.open_receipt(self.last_invoice_path):
+            messagebox.showinfo("Info", f"Please open the invoice manually from:\n{self.last_invoice_path}")
 
 
 class BoutiqueApp(tk.Tk):
     """Main application class"""
+    # Pages reloaded when shown: the tables they display and the method to call
+    PAGE_REFRESH = {
+        "DashboardPage": (('products',), 'update_stats'),
+        "InventoryPage": (('products',), 'load_inventory'),
+        "ReceiptPage": (('products',), 'load_products'),
+    }
+    BROWSER_PAGE_SIZE = 200  # Database Browser rows fetched per scroll step
+    BROWSER_QUERY_LIMIT = 1000  # rows shown for a custom SELECT
+    EXPORT_PAGE_SIZE = 1000  # products read per query by Export to JSON
+    
     def __init__(self):
         tk.Tk.__init__(self)
         
@@ -1115,6 +2982,21 @@ class BoutiqueApp(tk.Tk):
         # Initialize data manager
         self.data_manager = DataManager()
         
+        # Database worker thread for everything the pages load or save
+        self.db_worker = DatabaseWorker(self.data_manager.db.db_name)
+        self.busy_count = 0
+        self.change_tracker = ChangeTracker()
+        
+        # Invoice PDFs render off the Tk thread, after the sale is committed
+        self.invoice_renderer = InvoiceRenderQueue()
+        
+        # Invoices live in month folders; closed months are bundled and the
+        # loose PDFs kept to a size budget in the background
+        self.invoice_archive = InvoiceArchive()
+        self.invoice_cache = InvoiceCache(self.invoice_archive)
+        self.invoice_cache.start_background_maintenance()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Create menu bar
         self.create_menu_bar()
         
@@ -1135,6 +3017,51 @@ class BoutiqueApp(tk.Tk):
         # Show login page first
         self.show_frame("LoginPage")
     
+    def run_db(self, func, *args, on_done=None, on_error=None):
+        """Run a database call on the worker thread and deliver the result to the UI
+        
+        func is a DatabaseManager method name or a callable taking the
+        DatabaseManager. on_done(result) or on_error(exception) is called
+        on the Tk thread once the call finishes; meanwhile the window shows
+        a busy cursor.
+        """
+        future = self.db_worker.submit(func, *args)
+        self.set_busy(True)
+        self.after(5, self._deliver_result, future, on_done, on_error)
+        return future
+    
+    def _deliver_result(self, future, on_done, on_error):
+        """Poll a worker Future from the Tk event loop"""
+        if not future.done():
+            self.after(10, self._deliver_result, future, on_done, on_error)
+            return
+        
+        self.set_busy(False)
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                messagebox.showerror("Database Error", f"Database operation failed:\n{str(e)}")
+            return
+        if on_done:
+            on_done(result)
+    
+    def set_busy(self, busy):
+        """Show a busy cursor while database calls are pending"""
+        self.busy_count += 1 if busy else -1
+        self.busy_count = max(self.busy_count, 0)
+        self.config(cursor='watch' if self.busy_count else '')
+    
+    def on_close(self):
+        """Finish queued invoices, stop the database worker and close the window"""
+        self.invoice_renderer.shutdown(wait=True)
+        self.db_worker.submit('prune_product_changes')
+        self.db_worker.stop()
+        self.data_manager.db.close()
+        self.destroy()
+    
     def create_menu_bar(self):
         """Create application menu bar"""
         menubar = tk.Menu(self)
@@ -1183,7 +3110,7 @@ class BoutiqueApp(tk.Tk):
         table_listbox = tk.Listbox(left_frame, font=('Arial', 10))
         table_listbox.pack(fill='both', expand=True, padx=10, pady=(0, 10))
         
-        tables = ['products', 'users', 'receipts', 'receipt_items']
+        tables = DatabaseManager.BROWSABLE_TABLES
         for table in tables:
             table_listbox.insert(tk.END, table)
         
@@ -1215,9 +3142,7 @@ class BoutiqueApp(tk.Tk):
         x_scroll = tk.Scrollbar(tree_frame, orient='horizontal')
         x_scroll.pack(side='bottom', fill='x')
         
-        tree = ttk.Treeview(tree_frame, yscrollcommand=y_scroll.set, 
-                           xscrollcommand=x_scroll.set)
-        y_scroll.config(command=tree.yview)
+        tree = ttk.Treeview(tree_frame, xscrollcommand=x_scroll.set)
         x_scroll.config(command=tree.xview)
         tree.pack(fill='both', expand=True)
         
@@ -1226,6 +3151,26 @@ class BoutiqueApp(tk.Tk):
                             font=('Arial', 9), fg='#7f8c8d')
         info_label.pack(pady=5)
         
+        # Tables are read a page at a time by rowid as the user scrolls,
+        # so opening one with a million rows costs the same as a small one
+        loaded = {'table': None, 'rows': 0}
+        
+        def insert_row(row):
+            tree.insert('', 'end', values=row[1:])  # row[0] is the rowid
+            loaded['rows'] += 1
+            info_label.config(text=f"Showing {loaded['rows']:,} records from '{loaded['table']}' table (scroll for more)")
+        
+        pager = InfiniteScroll(self, tree, y_scroll, lambda db, after, limit: [],
+                               key_of=lambda row: row[0], insert_row=insert_row,
+                               page_size=self.BROWSER_PAGE_SIZE)
+        
+        def show_columns(column_names):
+            tree["columns"] = column_names
+            tree["show"] = "headings"
+            for col in column_names:
+                tree.heading(col, text=col)
+                tree.column(col, width=150)
+        
         def load_table_data():
             selection = table_listbox.curselection()
             if not selection:
@@ -1235,38 +3180,24 @@ class BoutiqueApp(tk.Tk):
             table_name_label.config(text=table_name)
             
             # Clear existing tree
+            pager.stop()
             tree.delete(*tree.get_children())
             for col in tree["columns"]:
                 tree.heading(col, text="")
             tree["columns"] = ()
             tree["show"] = "tree headings"
             
-            try:
-                db = self.data_manager.db
-                # Get column names
-                db.cursor.execute(f"PRAGMA table_info({table_name})")
-                columns_info = db.cursor.fetchall()
-                column_names = [col[1] for col in columns_info]
-                
-                # Configure tree columns
-                tree["columns"] = column_names
-                tree["show"] = "headings"
-                
-                for col in column_names:
-                    tree.heading(col, text=col)
-                    tree.column(col, width=150)
-                
-                # Get data
-                db.cursor.execute(f"SELECT * FROM {table_name}")
-                rows = db.cursor.fetchall()
-                
-                for row in rows:
-                    tree.insert('', 'end', values=row)
-                
-                info_label.config(text=f"Showing {len(rows)} records from '{table_name}' table")
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load table data: {str(e)}")
+            def table_loaded(column_names):
+                if not tree.winfo_exists():
+                    return
+                show_columns(column_names)
+                loaded['table'], loaded['rows'] = table_name, 0
+                info_label.config(text=f"No records in '{table_name}' table")
+                pager.fetch_page = lambda db, after, limit: db.get_table_page(table_name, after or 0, limit)
+                pager.reset()
+            
+            self.run_db('get_table_columns', table_name, on_done=table_loaded,
+                        on_error=lambda e: messagebox.showerror("Error", f"Failed to load table data: {str(e)}"))
         
         # Bind table selection
         table_listbox.bind('<<ListboxSelect>>', lambda e: load_table_data())
@@ -1287,37 +3218,38 @@ class BoutiqueApp(tk.Tk):
             if not query:
                 return
             
-            try:
-                db = self.data_manager.db
+            def run_query(db):
                 db.cursor.execute(query)
-                
-                if query.strip().upper().startswith('SELECT'):
-                    # Clear and show results
-                    tree.delete(*tree.get_children())
-                    
-                    # Get column names from cursor
-                    if db.cursor.description:
-                        column_names = [desc[0] for desc in db.cursor.description]
-                        tree["columns"] = column_names
-                        tree["show"] = "headings"
-                        
-                        for col in column_names:
-                            tree.heading(col, text=col)
-                            tree.column(col, width=150)
-                        
-                        rows = db.cursor.fetchall()
-                        for row in rows:
-                            tree.insert('', 'end', values=row)
-                        
-                        info_label.config(text=f"Query returned {len(rows)} records")
-                        table_name_label.config(text="Custom Query")
-                else:
+                if db.cursor.description is None:
                     db.conn.commit()
+                    return None
+                column_names = [desc[0] for desc in db.cursor.description]
+                return column_names, db.cursor.fetchmany(self.BROWSER_QUERY_LIMIT)
+            
+            def query_done(result):
+                if not tree.winfo_exists():
+                    return
+                if result is None:
                     messagebox.showinfo("Success", "Query executed successfully!")
                     load_table_data()
-                    
-            except Exception as e:
-                messagebox.showerror("Query Error", f"Failed to execute query:\n{str(e)}")
+                    return
+                
+                # Clear and show results
+                column_names, rows = result
+                pager.stop()
+                tree.delete(*tree.get_children())
+                show_columns(column_names)
+                for row in rows:
+                    tree.insert('', 'end', values=row)
+                
+                if len(rows) == self.BROWSER_QUERY_LIMIT:
+                    info_label.config(text=f"Query results: first {len(rows):,} records shown")
+                else:
+                    info_label.config(text=f"Query returned {len(rows)} records")
+                table_name_label.config(text="Custom Query")
+            
+            self.run_db(run_query, on_done=query_done,
+                        on_error=lambda e: messagebox.showerror("Query Error", f"Failed to execute query:\n{str(e)}"))
         
         query_btn = tk.Button(query_frame, text="▶ Execute Query", font=('Arial', 9, 'bold'),
                              bg='#27ae60', fg='white', command=execute_query)
@@ -1329,44 +3261,44 @@ class BoutiqueApp(tk.Tk):
     
     def export_to_json(self):
         """Export database to JSON files"""
-        try:
-            # Export products
-            products = self.data_manager.get_all_products()
-            products_data = [p.to_dict() for p in products]
-            with open('products_export.json', 'w') as f:
-                json.dump(products_data, f, indent=4)
+        def export(db):
+            write_products_json(db, 'products_export.json', self.EXPORT_PAGE_SIZE)
             
             # Export users
-            db = self.data_manager.db
             db.cursor.execute('SELECT username, full_name, email FROM users')
             users = db.cursor.fetchall()
             users_data = [{'username': u[0], 'full_name': u[1], 'email': u[2]} for u in users]
             with open('users_export.json', 'w') as f:
                 json.dump(users_data, f, indent=4)
-            
-            messagebox.showinfo("Export Successful", 
-                              "Data exported successfully!\n\n"
-                              "Files created:\n"
-                              "- products_export.json\n"
-                              "- users_export.json")
-        except Exception as e:
-            messagebox.showerror("Export Failed", f"Failed to export data: {str(e)}")
+        
+        self.run_db(export,
+                    on_done=lambda _: messagebox.showinfo("Export Successful", 
+                                                          "Data exported successfully!\n\n"
+                                                          "Files created:\n"
+                                                          "- products_export.json\n"
+                                                          "- users_export.json"),
+                    on_error=lambda e: messagebox.showerror("Export Failed", f"Failed to export data: {str(e)}"))
     
     def backup_database(self):
         """Create a backup of the database"""
-        try:
-            import shutil
-            db_path = self.data_manager.db.db_name
-            backup_name = f"boutique_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            shutil.copy2(db_path, backup_name)
-            messagebox.showinfo("Backup Successful", f"Database backed up successfully!\n\nBackup file: {backup_name}")
-        except Exception as e:
-            messagebox.showerror("Backup Failed", f"Failed to backup database: {str(e)}")
+        backup_name = f"boutique_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        
+        def backup(db):
+            # Use SQLite's online backup so pages still in the WAL file are included
+            backup_conn = sqlite3.connect(backup_name)
+            try:
+                db.conn.backup(backup_conn)
+            finally:
+                backup_conn.close()
+        
+        self.run_db(backup,
+                    on_done=lambda _: messagebox.showinfo(
+                        "Backup Successful", f"Database backed up successfully!\n\nBackup file: {backup_name}"),
+                    on_error=lambda e: messagebox.showerror("Backup Failed", f"Failed to backup database: {str(e)}"))
     
     def show_db_info(self):
         """Show database information"""
-        try:
-            db = self.data_manager.db
+        def read_info(db):
             db_path = os.path.abspath(db.db_name)
             db_size = os.path.getsize(db_path) / 1024  # Size in KB
             
@@ -1380,26 +3312,37 @@ class BoutiqueApp(tk.Tk):
             db.cursor.execute('SELECT COUNT(*) FROM receipts')
             receipt_count = db.cursor.fetchone()[0]
             
-            info = (
+            settings = db.get_connection_settings()
+            
+            return (
                 f"Database Information\n"
                 f"{'='*40}\n\n"
                 f"Database File: {db_path}\n"
                 f"Database Size: {db_size:.2f} KB\n\n"
                 f"Tables:\n"
                 f"  • Products: {product_count} records\n"
-                f"  • Users: {user_count} records\n"                f"  • Receipts: {receipt_count} records\n\n"
+                f"  • Users: {user_count} records\n"
+                f"  • Receipts: {receipt_count} records\n\n"
+                f"Connection Settings:\n"
+                f"  • Journal Mode: {settings['journal_mode']}\n"
+                f"  • Synchronous: {settings['synchronous']}\n"
+                f"  • Cache Size: {settings['cache_size']}\n"
+                f"  • Memory Map: {settings['mmap_size'] / (1024 * 1024):.0f} MB\n"
+                f"  • Temp Store: {settings['temp_store']}\n"
+                f"  • Busy Timeout: {settings['busy_timeout']} ms\n"
+                f"  • Statement Cache: {settings['cached_statements']}\n\n"
                 f"Database Type: SQLite 3"
             )
-            
-            messagebox.showinfo("Database Information", info)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to get database info: {str(e)}")
+        
+        self.run_db(read_info,
+                    on_done=lambda info: messagebox.showinfo("Database Information", info),
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to get database info: {str(e)}"))
     
     def show_receipt_history(self):
         """Show receipt history window with download/open functionality"""
         history_window = tk.Toplevel(self)
         history_window.title("Invoice History - Download Invoices")
-        history_window.geometry("800x550")
+        history_window.geometry("800x600")
         
         # Header
         header = tk.Frame(history_window, bg='#2c3e50', height=60)
@@ -1407,6 +3350,19 @@ class BoutiqueApp(tk.Tk):
         tk.Label(header, text="📄 Invoice History", font=('Arial', 18, 'bold'),
                 bg='#2c3e50', fg='white').pack(pady=15)
         
+        # Filters
+        filter_frame = tk.Frame(history_window, bg='#ecf0f1')
+        filter_frame.pack(fill='x', padx=10, pady=(10, 0))
+        
+        filter_entries = {}
+        for label, key, width in (("From (YYYY-MM-DD):", 'since', 11), ("To:", 'until', 11),
+                                  ("Min UGX:", 'min_amount', 9), ("Max UGX:", 'max_amount', 9),
+                                  ("Invoice #:", 'receipt_number', 7)):
+            tk.Label(filter_frame, text=label, font=('Arial', 10), bg='#ecf0f1').pack(side='left', padx=(5, 2))
+            entry = tk.Entry(filter_frame, font=('Arial', 10), width=width)
+            entry.pack(side='left')
+            filter_entries[key] = entry
+        
         # Treeview
         tree_frame = tk.Frame(history_window)
         tree_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -1415,8 +3371,7 @@ class BoutiqueApp(tk.Tk):
         scrollbar.pack(side='right', fill='y')
         
         tree = ttk.Treeview(tree_frame, columns=('Receipt#', 'Total', 'Date', 'Filename'),
-                           show='headings', yscrollcommand=scrollbar.set)
-        scrollbar.config(command=tree.yview)
+                           show='headings')
         
         tree.heading('Receipt#', text='Invoice #')
         tree.heading('Total', text='Total Amount')
@@ -1430,18 +3385,78 @@ class BoutiqueApp(tk.Tk):
         
         tree.pack(fill='both', expand=True)
         
+        totals_label = tk.Label(history_window, text="", font=('Arial', 11, 'bold'),
+                              bg='#ecf0f1', fg='#2c3e50')
+        totals_label.pack(fill='x', padx=10)
+        
         # Load data
-        receipts = self.data_manager.db.get_receipt_history()
         receipt_map = {}  # Map tree items to filenames
         
-        for receipt in receipts:
+        def insert_receipt(receipt):
             item_id = tree.insert('', 'end', values=(
                 f"{receipt[1]:05d}",  # receipt_number formatted
                 f"UGX {receipt[2]:,.0f}",  # total_amount
-                receipt[4],  # created_at
+                parse_created_at(receipt[4]).strftime('%Y-%m-%d %H:%M:%S'),  # created_at, local time
                 receipt[3]   # filename
             ))
-            receipt_map[item_id] = receipt[3]  # Store filename
+            receipt_map[item_id] = (receipt[0], receipt[3])  # receipt_id, filename
+        
+        # Pages are fetched newest first, seeking past the (created_at, receipt_id)
+        # of the last row shown, as the user scrolls down
+        pager = InfiniteScroll(self, tree, scrollbar,
+                               lambda db, before, limit: db.get_receipt_page(before, limit),
+                               key_of=lambda receipt: (receipt[4], receipt[0]),
+                               insert_row=insert_receipt)
+        
+        def read_filters():
+            """Filter values from the entries, None for blank ones; raises ValueError on bad input"""
+            values = {key: entry.get().strip() or None for key, entry in filter_entries.items()}
+            for key in ('since', 'until'):
+                if values[key]:
+                    day = datetime.strptime(values[key], '%Y-%m-%d')
+                    if key == 'until':
+                        day += timedelta(days=1)  # the To date is inclusive
+                    # Local midnight as a UTC bound, since created_at is recorded in UTC
+                    values[key] = day.astimezone().astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            for key in ('min_amount', 'max_amount'):
+                if values[key]:
+                    values[key] = float(values[key].replace(',', ''))
+            if values['receipt_number']:
+                values['receipt_number'] = int(values['receipt_number'])
+            return values
+        
+        def show_totals(totals):
+            if totals_label.winfo_exists():
+                count, amount = totals
+                totals_label.config(text=f"{count:,} invoices, UGX {amount:,.0f}")
+        
+        def search():
+            try:
+                values = read_filters()
+            except ValueError:
+                messagebox.showerror("Invalid Filter",
+                                   "Dates must be YYYY-MM-DD, amounts and invoice numbers must be numbers")
+                return
+            pager.fetch_page = lambda db, before, limit: db.get_receipt_page(before, limit, **values)
+            receipt_map.clear()
+            totals_label.config(text="Counting...")
+            pager.reset()
+            self.run_db('get_receipt_totals', values['since'], values['until'], values['min_amount'],
+                        values['max_amount'], values['receipt_number'], on_done=show_totals)
+        
+        def clear_filters():
+            for entry in filter_entries.values():
+                entry.delete(0, 'end')
+            search()
+        
+        tk.Button(filter_frame, text="🔍 Search", font=('Arial', 10, 'bold'), bg='#3498db', fg='white',
+                 command=search).pack(side='left', padx=(10, 2))
+        tk.Button(filter_frame, text="Clear", font=('Arial', 10), bg='#95a5a6', fg='white',
+                 command=clear_filters).pack(side='left', padx=2)
+        for entry in filter_entries.values():
+            entry.bind('<Return>', lambda e: search())
+        
+        search()
         
         # Button frame
         btn_frame = tk.Frame(history_window, bg='#ecf0f1')
@@ -1454,20 +3469,21 @@ class BoutiqueApp(tk.Tk):
                 messagebox.showwarning("No Selection", "Please select an invoice to open")
                 return
             
-            filename = receipt_map[selection[0]]
-            receipts_folder = ReceiptGenerator.get_receipts_folder()
-            full_path = os.path.join(receipts_folder, filename)
+            receipt_id, filename = receipt_map[selection[0]]
             
-            if not os.path.exists(full_path):
-                messagebox.showerror("File Not Found", 
-                                   f"Invoice file not found:\n{full_path}\n\n"
-                                   f"The file may have been moved or deleted.")
-                return
+            def open_invoice(full_path):
+                if full_path is None:
+                    messagebox.showerror("Invoice Not Found",
+                                       f"Invoice {filename} could not be found or rebuilt:\n"
+                                       f"the sale is no longer in the database.")
+                elif not ReceiptGenerator.open_receipt(full_path):
+                    messagebox.showerror("Error", f"Could not open invoice.\n\nPath: {full_path}")
             
-            if ReceiptGenerator.open_receipt(full_path):
-                messagebox.showinfo("Success", "Invoice opened successfully!")
-            else:
-                messagebox.showerror("Error", f"Could not open invoice.\n\nPath: {full_path}")
+            # Finds the stored PDF (loose, legacy or bundled) or renders it again
+            # from the database, on the worker thread
+            self.run_db(lambda db: self.invoice_cache.get_invoice(db, receipt_id, filename),
+                        on_done=open_invoice,
+                        on_error=lambda e: messagebox.showerror("Error", f"Could not open invoice:\n{str(e)}"))
         
         def open_receipts_folder():
             """Open the receipts folder in file explorer"""
@@ -1538,20 +3554,20 @@ class BoutiqueApp(tk.Tk):
         tree.pack(fill='both', expand=True)
         
         # Load low stock items
-        products = self.data_manager.get_all_products()
-        low_stock_items = [p for p in products if p.quantity < 10]
-        
-        for product in low_stock_items:
-            tree.insert('', 'end', values=(
-                product.product_id,
-                product.name,
-                product.quantity,
-                f"UGX {product.price:,.0f}"
-            ))
+        def show_low_stock(low_stock_items):
+            for product_id, name, price, quantity in low_stock_items:
+                tree.insert('', 'end', values=(
+                    product_id,
+                    name,
+                    quantity,
+                    f"UGX {price:,.0f}"
+                ))
+            
+            if not low_stock_items:
+                tk.Label(report_window, text="✓ All items have sufficient stock!", 
+                        font=('Arial', 14), fg='#27ae60').pack(pady=20)
         
-        if not low_stock_items:
-            tk.Label(report_window, text="✓ All items have sufficient stock!", 
-                    font=('Arial', 14), fg='#27ae60').pack(pady=20)
+        self.run_db('get_low_stock_products', on_done=show_low_stock)
     
     def show_inventory_report(self):
         """Show full inventory report"""
@@ -1569,14 +3585,19 @@ class BoutiqueApp(tk.Tk):
         summary_frame = tk.Frame(report_window, bg='#ecf0f1')
         summary_frame.pack(fill='x', padx=10, pady=10)
         
-        db = self.data_manager.db
-        total_products = len(db.get_all_products())
-        total_value = db.get_total_inventory_value()
+        total_products_label = tk.Label(summary_frame, text="Total Products: ...", 
+                font=('Arial', 12, 'bold'), bg='#ecf0f1')
+        total_products_label.pack(side='left', padx=20)
+        total_value_label = tk.Label(summary_frame, text="Total Value: ...", 
+                font=('Arial', 12, 'bold'), bg='#ecf0f1', fg='#27ae60')
+        total_value_label.pack(side='left', padx=20)
+        
+        def show_summary(summary):
+            total_products, total_value, _ = summary
+            total_products_label.config(text=f"Total Products: {total_products}")
+            total_value_label.config(text=f"Total Value: UGX {total_value:,.0f}")
         
-        tk.Label(summary_frame, text=f"Total Products: {total_products}", 
-                font=('Arial', 12, 'bold'), bg='#ecf0f1').pack(side='left', padx=20)
-        tk.Label(summary_frame, text=f"Total Value: UGX {total_value:,.0f}", 
-                font=('Arial', 12, 'bold'), bg='#ecf0f1', fg='#27ae60').pack(side='left', padx=20)
+        self.run_db('get_inventory_summary', on_done=show_summary)
         
         # Treeview
         tree_frame = tk.Frame(report_window)
@@ -1598,16 +3619,18 @@ class BoutiqueApp(tk.Tk):
         tree.pack(fill='both', expand=True)
         
         # Load data
-        products = self.data_manager.get_all_products()
-        for product in products:
-            total_value = product.price * product.quantity
-            tree.insert('', 'end', values=(
-                product.product_id,
-                product.name,
-                f"{product.price:,.0f}",
-                product.quantity,
-                f"{total_value:,.0f}"
-            ))
+        def show_products(products):
+            for product_id, name, price, quantity in products:
+                total_value = price * quantity
+                tree.insert('', 'end', values=(
+                    product_id,
+                    name,
+                    f"{price:,.0f}",
+                    quantity,
+                    f"{total_value:,.0f}"
+                ))
+        
+        self.run_db('get_all_products', on_done=show_products)
     
     def show_about(self):
         """Show about dialog"""
@@ -1631,13 +3654,16 @@ class BoutiqueApp(tk.Tk):
         frame = self.frames[page_name]
         frame.tkraise()
         
-        # Update specific frames when shown
-        if page_name == "DashboardPage":
-            frame.update_stats()
-        elif page_name == "InventoryPage":
-            frame.load_inventory()
-        elif page_name == "ReceiptPage":
-            frame.load_products()
+        # Update specific frames when shown, if their data changed since
+        if page_name in self.PAGE_REFRESH:
+            self.run_db(self.change_tracker.poll,
+                        on_done=lambda versions: self.refresh_if_changed(page_name, versions))
+    
+    def refresh_if_changed(self, page_name, versions):
+        tables, method_name = self.PAGE_REFRESH[page_name]
+        if self.change_tracker.is_dirty(page_name, tables, versions):
+            self.change_tracker.mark_clean(page_name, tables, versions)
+            getattr(self.frames[page_name], method_name)()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Legacy Data Migration for JK's Boutique Application
+Moves the old inventory.json / users.json files into the SQLite database
+
+The JSON files are read as a stream, so even very large files are never
+loaded into memory at once. Running the migration again is safe: products
+that already exist (same product_id and name) and users with an existing
+username are skipped. A legacy product whose product_id now belongs to a
+different product is not migrated and is reported as a conflict.
+"""
+
+import argparse
+import json
+import os
+from itertools import islice
+
+from main import DatabaseManager
+
+
+def iter_json_array(path, chunk_size=64 * 1024):
+    """Yield the elements of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    separators = ' \t\r\n,'
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        position = 1
+        end_of_file = False
+
+        while True:
+            while position < len(buffer) and buffer[position] in separators:
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                element, position_after = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element is cut off at the end of the buffer, read more
+                if end_of_file:
+                    raise
+                more = f.read(chunk_size)
+                if not more:
+                    end_of_file = True
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            yield element
+            position = position_after
+
+
+def legacy_product_row(record):
+    """Turn a legacy inventory.json entry into a (product_id, name, price, quantity) row"""
+    name = str(record.get('name', '')).strip()
+    if not name:
+        raise ValueError("Missing product name")
+    product_id = int(record['product_id']) if record.get('product_id') is not None else None
+    price = float(record['price'])
+    quantity = int(record['quantity'])
+    if price < 0 or quantity < 0:
+        raise ValueError("Negative price or quantity")
+    return product_id, name, price, quantity
+
+
+def legacy_user_row(record):
+    """Turn a legacy users.json entry into a (username, password, full_name, email) row"""
+    username = str(record.get('username', '')).strip()
+    if not username or not record.get('password'):
+        raise ValueError("Missing username or password")
+    return username, record['password'], record.get('full_name', ''), record.get('email', '')
+
+
+def write_products(db, rows):
+    """Add legacy products, returns (added, conflicts)
+
+    conflicts lists (product_id, legacy_name, existing_name) for products
+    whose product_id is already taken by a product with another name.
+    """
+    ids = [row[0] for row in rows if row[0] is not None]
+    db.cursor.execute('SELECT product_id, name FROM products WHERE product_id IN (SELECT value FROM json_each(?))',
+                      (json.dumps(ids),))
+    existing = dict(db.cursor.fetchall())
+    conflicts = [(product_id, name, existing[product_id]) for product_id, name, price, quantity in rows
+                 if product_id in existing and existing[product_id].casefold() != name.casefold()]
+    return db.bulk_upsert_products(rows, update_existing=False), conflicts
+
+
+def migrate_file(path, to_row, write_batch, batch_size=5000):
+    """Stream one legacy file into the database, returns (read, added, skipped, conflicts)
+
+    write_batch(rows) returns (added, conflicts) for one batch of rows.
+    """
+    records = iter_json_array(path)
+    read = added = skipped = 0
+    conflicts = []
+
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        rows = []
+        for record in chunk:
+            read += 1
+            try:
+                rows.append(to_row(record))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                skipped += 1
+        if rows:
+            batch_added, batch_conflicts = write_batch(rows)
+            added += batch_added
+            conflicts.extend(batch_conflicts)
+
+    return read, added, skipped, conflicts
+
+
+def migrate_legacy_data(db, inventory_file='inventory.json', users_file='users.json', batch_size=5000):
+    """Migrate the legacy JSON files that exist, returns a summary per file"""
+    summary = {}
+
+    if os.path.exists(inventory_file):
+        summary['products'] = migrate_file(
+            inventory_file, legacy_product_row, lambda rows: write_products(db, rows), batch_size
+        )
+
+    if os.path.exists(users_file):
+        summary['users'] = migrate_file(
+            users_file, legacy_user_row, lambda rows: (db.bulk_insert_users(rows), []), batch_size
+        )
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate inventory.json / users.json into SQLite")
+    parser.add_argument('--db', default='boutique.db', help='database file (default: boutique.db)')
+    parser.add_argument('--inventory', default='inventory.json', help='legacy products file')
+    parser.add_argument('--users', default='users.json', help='legacy users file')
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help='rows per transaction (default: 5000)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("JK's Boutique - Legacy Data Migration")
+    print("=" * 60)
+
+    db = DatabaseManager(args.db)
+    try:
+        summary = migrate_legacy_data(db, args.inventory, args.users, args.batch_size)
+    finally:
+        db.close()
+
+    if not summary:
+        print("\nℹ️  No legacy files found, nothing to migrate.")
+    for table, (read, added, skipped, conflicts) in summary.items():
+        print(f"\n✅ {table}: {read:,} read, {added:,} added, "
+              f"{read - added - skipped - len(conflicts):,} already present, {skipped:,} invalid")
+        if conflicts:
+            print(f"⚠️  {len(conflicts):,} not migrated, their product_id belongs to another product:")
+            for product_id, legacy_name, existing_name in conflicts[:20]:
+                print(f"   #{product_id}: '{legacy_name}' in {args.inventory}, '{existing_name}' in the database")
+            if len(conflicts) > 20:
+                print(f"   ... and {len(conflicts) - 20:,} more")
+    print("\n" + "=" * 60)
@@ -0,0 +1,184 @@
+"""
+Invoice Reprint Engine for JK's Boutique Application
+Regenerates invoice PDFs from the receipts/receipt_items tables
+
+Use it after a branding change, or to reissue a period of invoices for the
+auditors. Receipts are streamed from SQLite in receipt_id order and rendered
+on a process pool with the same layout as the till (ReceiptGenerator).
+
+Example (reissue March 2025 on every CPU core):
+    python reprint_invoices.py --since 2025-03-01 --until 2025-03-31
+
+Progress is saved to a checkpoint file after every finished chunk, so an
+interrupted run picks up where it stopped when started again with the same
+options. Dates are compared with receipts.created_at, which SQLite stores
+in UTC.
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from main import DatabaseManager, ReceiptGenerator, parse_created_at
+
+CHECKPOINT_FILENAME = 'reprint_checkpoint.json'
+
+
+def render_chunk(receipts, output_folder):
+    """Process pool worker: render a chunk of receipts, returns (rendered, failures)"""
+    rendered = 0
+    failures = []
+    for receipt_id, receipt_number, total, filename, created_at, items in receipts:
+        try:
+            if os.path.isabs(filename):
+                filename = os.path.basename(filename)
+            os.makedirs(os.path.dirname(os.path.join(output_folder, filename)), exist_ok=True)
+            ReceiptGenerator.generate_receipt(items, total, receipt_number, filename,
+                                              output_folder, parse_created_at(created_at))
+            rendered += 1
+        except Exception as e:
+            failures.append([receipt_id, str(e)])
+    return rendered, failures
+
+
+def load_checkpoint(path, selection):
+    """Read a checkpoint for this selection of receipts, None if there isn't one"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('selection') != selection:
+        raise ValueError(f"{path} belongs to a different reprint, use --restart or another --checkpoint")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically, an interrupted write never loses progress"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def reprint_invoices(db_path, output_folder, first_id=None, last_id=None, since=None, until=None,
+                     workers=None, chunk_size=200, checkpoint_path=None, restart=False, verbose=True):
+    """Re-render the selected invoices into output_folder, returns a summary dict
+
+    first_id/last_id select a receipt_id range and since/until a created_at
+    range ('YYYY-MM-DD HH:MM:SS' prefixes, until is exclusive); they can be
+    combined. Chunks are rendered in parallel but checkpointed in order, so
+    the checkpoint always marks a point before which everything is done.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_folder, exist_ok=True)
+    if checkpoint_path is None:
+        checkpoint_path = os.path.join(output_folder, CHECKPOINT_FILENAME)
+
+    selection = {'first_id': first_id, 'last_id': last_id, 'since': since, 'until': until}
+    checkpoint = None if restart else load_checkpoint(checkpoint_path, selection)
+    if checkpoint is None:
+        checkpoint = {'selection': selection, 'last_receipt_id': 0, 'rendered': 0, 'failed': []}
+    already_rendered = checkpoint['rendered']
+
+    db = DatabaseManager(db_path)
+    start = time.perf_counter()
+    rendered = 0
+    try:
+        low, high = db.get_receipt_id_range(since, until)
+        if low is not None:
+            after = max(checkpoint['last_receipt_id'], (first_id or low) - 1)
+            last = min(high, last_id) if last_id else high
+            span = max(last - low + 1, 1)
+            in_flight = deque()
+            exhausted = False
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                while True:
+                    # Keep every worker busy, with one chunk waiting behind each
+                    while not exhausted and len(in_flight) < workers * 2:
+                        batch = db.get_receipts_with_items(after, last, chunk_size, since, until)
+                        if not batch:
+                            exhausted = True
+                            break
+                        after = batch[-1][0]
+                        in_flight.append((after, pool.submit(render_chunk, batch, output_folder)))
+                    if not in_flight:
+                        break
+
+                    chunk_last_id, future = in_flight.popleft()
+                    chunk_rendered, failures = future.result()
+                    rendered += chunk_rendered
+                    checkpoint['last_receipt_id'] = chunk_last_id
+                    checkpoint['rendered'] += chunk_rendered
+                    checkpoint['failed'].extend(failures)
+                    save_checkpoint(checkpoint_path, checkpoint)
+
+                    if verbose:
+                        elapsed = time.perf_counter() - start
+                        done = min((chunk_last_id - low + 1) / span, 1)
+                        print(f"\r   {done:6.1%}  {checkpoint['rendered']:,} invoices "
+                              f"({rendered / elapsed if elapsed else 0:,.1f}/s), "
+                              f"{len(checkpoint['failed'])} failed", end='', flush=True)
+            if verbose:
+                print()
+    finally:
+        db.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        'rendered': rendered,
+        'resumed_from': already_rendered,
+        'failed': checkpoint['failed'],
+        'seconds': seconds,
+        'invoices_per_second': rendered / seconds if seconds else 0.0,
+        'checkpoint': checkpoint_path,
+    }
+
+
+def day_bound(day, inclusive_end=False):
+    """Local midnight of 'YYYY-MM-DD' as a created_at bound in UTC, the day after for an inclusive end date"""
+    if day is None:
+        return None
+    date = datetime.strptime(day, '%Y-%m-%d')
+    if inclusive_end:
+        date += timedelta(days=1)
+    return date.astimezone().astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-render invoice PDFs from the sales database")
+    parser.add_argument('--db', default='boutique.db', help='database file (default: boutique.db)')
+    parser.add_argument('--output', help='folder for the new PDFs (default: receipts/reprints)')
+    parser.add_argument('--from-id', type=int, help='first receipt_id to reprint')
+    parser.add_argument('--to-id', type=int, help='last receipt_id to reprint')
+    parser.add_argument('--since', help='first sale date to reprint, YYYY-MM-DD')
+    parser.add_argument('--until', help='last sale date to reprint, YYYY-MM-DD (inclusive)')
+    parser.add_argument('--workers', type=int, help='render processes (default: one per CPU core)')
+    parser.add_argument('--chunk-size', type=int, default=200, help='receipts per chunk (default: 200)')
+    parser.add_argument('--checkpoint', help=f'checkpoint file (default: {CHECKPOINT_FILENAME} in the output folder)')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint and start over')
+    args = parser.parse_args()
+
+    output_folder = args.output or os.path.join(ReceiptGenerator.get_receipts_folder(), 'reprints')
+
+    print("=" * 60)
+    print("JK's Boutique - Invoice Reprint")
+    print("=" * 60)
+    print(f"\n📁 Database: {args.db}")
+    print(f"📂 Output:   {output_folder}\n")
+
+    summary = reprint_invoices(args.db, output_folder, args.from_id, args.to_id,
+                               day_bound(args.since), day_bound(args.until, inclusive_end=True),
+                               args.workers, args.chunk_size, args.checkpoint, args.restart)
+
+    if summary['resumed_from']:
+        print(f"\n↪️  Resumed after {summary['resumed_from']:,} invoices from {summary['checkpoint']}")
+    print(f"\n✅ {summary['rendered']:,} invoices rendered in {summary['seconds']:.1f}s "
+          f"({summary['invoices_per_second']:,.1f} invoices/sec)")
+    if summary['failed']:
+        print(f"⚠️  {len(summary['failed'])} invoices failed, see {summary['checkpoint']}")
+    print("\n" + "=" * 60)
@@ -0,0 +1,103 @@
+"""
+Test Cart
+Checks the till's cart: one line per product and stock reserved in memory
+"""
+
+import pytest
+
+from main import Cart, InsufficientStockError, Product
+
+DRESS = Product(1, 'Kids Dress', 35000, 3)
+SHORTS = Product(2, 'Kids Shorts', 12000, 10)
+
+
+@pytest.fixture
+def cart():
+    return Cart()
+
+
+def test_same_product_merges_into_one_line(cart):
+    assert cart.add(DRESS, 1) == 0
+    assert cart.add(SHORTS, 2) == 1
+    assert cart.add(DRESS, 1) == 0
+
+    assert cart.items() == [
+        {'product_id': 1, 'name': 'Kids Dress', 'price': 35000, 'quantity': 2, 'subtotal': 70000},
+        {'product_id': 2, 'name': 'Kids Shorts', 'price': 12000, 'quantity': 2, 'subtotal': 24000},
+    ]
+    assert cart.total == 94000
+
+
+def test_reservations_cannot_oversell_across_adds(cart):
+    cart.add(DRESS, 2)
+
+    with pytest.raises(InsufficientStockError) as error:
+        cart.add(DRESS, 2)
+
+    assert (error.value.requested, error.value.available) == (4, 3)
+    assert cart.quantities[1] == 2  # the failed add changed nothing
+    assert cart.available(1) == 1
+
+
+def test_quantity_must_be_positive(cart):
+    with pytest.raises(ValueError):
+        cart.add(DRESS, 0)
+    assert len(cart) == 0
+
+
+def test_scanned_products_are_remembered(cart):
+    cart.add(SHORTS, 1, sku='6001234500017')
+
+    assert cart.product_for_sku('6001234500017') is SHORTS
+    assert cart.product_for_sku('unknown') is None
+    cart.remove(2)
+    assert cart.product_for_sku('6001234500017') is None
+    assert cart.items() == []
+
+
+def test_newer_stock_flags_short_lines(cart):
+    cart.add(DRESS, 3)
+    cart.add(SHORTS, 1)
+
+    short = cart.update_stock([Product(1, 'Kids Dress', 35000, 1), Product(2, 'Kids Shorts', 12000, 9),
+                               Product(3, 'Baby Blanket', 30000, 0)])
+
+    assert [product.product_id for product in short] == [1]
+    assert cart.available(2) == 8
+    assert 3 not in cart.products
+
+
+def test_recorded_sale_leaves_lines_added_after_it(cart):
+    cart.add(DRESS, 1)
+    cart.add(SHORTS, 2)
+    sold = cart.items()
+
+    # Scanned while the sale was being saved
+    cart.add(SHORTS, 1)
+    cart.add(Product(3, 'Baby Blanket', 30000, 5), 1)
+    cart.remove_sold(sold)
+
+    assert cart.items() == [
+        {'product_id': 2, 'name': 'Kids Shorts', 'price': 12000, 'quantity': 1, 'subtotal': 12000},
+        {'product_id': 3, 'name': 'Baby Blanket', 'price': 30000, 'quantity': 1, 'subtotal': 30000},
+    ]
+    assert 1 not in cart.products
+
+
+def test_recorded_sale_after_the_cart_was_cleared(cart):
+    cart.add(DRESS, 1)
+    sold = cart.items()
+    cart.clear()
+
+    cart.remove_sold(sold)
+
+    assert len(cart) == 0
+
+
+def test_checkout_accepts_the_cart_lines(db, cart):
+    product_id = db.add_product('Kids Dress', 35000, 3)
+    cart.add(Product(*db.get_product(product_id)), 2)
+
+    db.checkout(cart.items(), lambda number: f"invoice_{number}.pdf")
+
+    assert db.get_product(product_id)[3] == 1
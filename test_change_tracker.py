@@ -0,0 +1,58 @@
+"""
+Test Change Tracker
+Checks that pages are only reloaded when their tables were written, by this
+connection or by another process
+"""
+
+import pytest
+
+from main import ChangeTracker, DatabaseManager
+
+
+@pytest.fixture
+def tracker():
+    return ChangeTracker()
+
+
+def test_own_writes_are_seen(db, tracker):
+    before = tracker.poll(db)
+    db.add_product('Kids Dress', 35000, 4)
+    after = tracker.poll(db)
+
+    assert after['products'] == before['products'] + 1
+    assert set(after) == {'products'}  # the only table a refreshed page displays
+
+
+def test_writes_from_another_connection_are_seen(db, tracker, tmp_path):
+    before = tracker.poll(db)
+    other = DatabaseManager(str(tmp_path / 'test.db'))
+    try:
+        other.add_product('Kids Shorts', 12000, 2)
+    finally:
+        other.close()
+
+    assert tracker.poll(db)['products'] > before['products']
+
+
+def test_no_query_while_nothing_changed(db, tracker):
+    tracker.poll(db)
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        tracker.poll(db)
+    finally:
+        db.conn.set_trace_callback(None)
+
+    assert statements == ['PRAGMA data_version']
+
+
+def test_pages_are_dirty_until_reloaded(db, tracker):
+    versions = tracker.poll(db)
+    assert tracker.is_dirty('InventoryPage', ('products',), versions)
+
+    tracker.mark_clean('InventoryPage', ('products',), versions)
+    assert not tracker.is_dirty('InventoryPage', ('products',), tracker.poll(db))
+
+    product_id = db.add_product('Baby Blanket', 30000, 1)
+    db.delete_product(product_id)
+    assert tracker.is_dirty('InventoryPage', ('products',), tracker.poll(db))
@@ -0,0 +1,56 @@
+"""
+Test Database Worker
+Checks that database calls run on the worker thread and come back as futures
+"""
+
+import threading
+
+import pytest
+
+from main import DatabaseWorker
+
+
+@pytest.fixture
+def worker(tmp_path):
+    database_worker = DatabaseWorker(str(tmp_path / 'test.db'))
+    yield database_worker
+    database_worker.stop()
+
+
+def test_method_name_returns_result(worker):
+    product_id = worker.submit('add_product', 'Kids Dress', 35000, 4).result(timeout=5)
+
+    assert worker.submit('get_product', product_id).result(timeout=5) == (product_id, 'Kids Dress', 35000, 4)
+
+
+def test_callable_runs_on_worker_thread(worker):
+    thread_name = worker.submit(lambda db: threading.current_thread().name).result(timeout=5)
+
+    assert thread_name == 'DatabaseWorker'
+    assert thread_name != threading.current_thread().name
+
+
+def test_errors_are_set_on_the_future(worker):
+    future = worker.submit(lambda db: db.cursor.execute('SELECT * FROM missing_table'))
+
+    with pytest.raises(Exception, match='missing_table'):
+        future.result(timeout=5)
+    # The worker keeps serving requests after a failure
+    assert worker.submit('get_product_count').result(timeout=5) == 0
+
+
+def test_requests_run_in_order(worker):
+    futures = [worker.submit('add_product', f"Item {i}", 1000, 1) for i in range(20)]
+
+    assert [future.result(timeout=5) for future in futures] == list(range(1, 21))
+
+
+def test_database_browser_reads_tables_a_page_at_a_time(worker):
+    worker.submit('bulk_upsert_products', [(None, f"Product {i}", 1000, i) for i in range(5)]).result(timeout=5)
+
+    assert worker.submit('get_table_columns', 'products').result(timeout=5)[:4] == \
+        ['product_id', 'name', 'price', 'quantity']
+    page = worker.submit('get_table_page', 'products', 2, 2).result(timeout=5)
+    assert [row[:3] for row in page] == [(3, 3, 'Product 2'), (4, 4, 'Product 3')]
+    with pytest.raises(ValueError):
+        worker.submit('get_table_page', 'sqlite_master').result(timeout=5)
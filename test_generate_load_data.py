@@ -0,0 +1,66 @@
+"""
+Test Load Data Generator
+Checks row counts of a small generated dataset and that the same seed
+always produces the same data, timestamps included
+"""
+
+import sqlite3
+
+from generate_load_data import generate_load_data
+from main import DatabaseManager
+
+
+def generate(path, seed, **options):
+    return generate_load_data(str(path), products=50, receipts=40, items_per_receipt=3,
+                              days=30, seed=seed, batch_size=16, verbose=False, **options)
+
+
+def dump(path):
+    """Everything generated"""
+    conn = sqlite3.connect(str(path))
+    try:
+        return {
+            'products': conn.execute('SELECT product_id, name, price, quantity FROM products').fetchall(),
+            'receipts': conn.execute('SELECT receipt_id, receipt_number, total_amount, filename, created_at '
+                                     'FROM receipts').fetchall(),
+            'receipt_items': conn.execute('SELECT receipt_id, product_id, product_name, price, quantity, subtotal '
+                                          'FROM receipt_items ORDER BY item_id').fetchall(),
+        }
+    finally:
+        conn.close()
+
+
+def test_generated_row_counts(tmp_path):
+    summary = generate(tmp_path / 'load.db', seed=7)
+    data = dump(tmp_path / 'load.db')
+
+    assert (summary['products'], summary['receipts']) == (50, 40)
+    assert len(data['products']) == 50
+    assert len(data['receipts']) == 40
+    assert len(data['receipt_items']) == summary['receipt_items']
+    assert 40 <= summary['receipt_items'] <= 40 * 5  # 1 to 2 * items_per_receipt - 1 lines each
+
+    db = DatabaseManager(str(tmp_path / 'load.db'))
+    try:
+        assert db.get_next_receipt_number() == 41
+        assert db.check_inventory_summary()
+    finally:
+        db.close()
+
+
+def test_same_seed_same_data(tmp_path):
+    generate(tmp_path / 'first.db', seed=7)
+    generate(tmp_path / 'second.db', seed=7)
+    generate(tmp_path / 'other.db', seed=8)
+
+    assert dump(tmp_path / 'first.db') == dump(tmp_path / 'second.db')
+    assert dump(tmp_path / 'first.db') != dump(tmp_path / 'other.db')
+
+
+def test_sales_end_on_the_given_date(tmp_path):
+    generate(tmp_path / 'load.db', seed=7, end='2024-03-01')
+    created = [receipt[4] for receipt in dump(tmp_path / 'load.db')['receipts']]
+
+    assert created == sorted(created)
+    assert '2024-01-31 00:00:00' <= created[0] and created[-1] < '2024-03-01 00:00:00'
+
@@ -0,0 +1,96 @@
+"""
+Test Inventory
+Checks the product queries behind the InventoryPage: paging and change tracking
+"""
+
+import sqlite3
+
+from benchmark import find_full_scans
+
+
+def test_product_pages_cover_the_catalogue_once(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000 + i, i) for i in range(25)])
+    db.delete_product(10)
+
+    pages, after_id = [], 0
+    while True:
+        page = db.get_product_page(after_id, limit=10)
+        pages.append(page)
+        if len(page) < 10:
+            break
+        after_id = page[-1][0]
+
+    assert [len(page) for page in pages] == [10, 10, 4]
+    assert [product[0] for page in pages for product in page] == [i for i in range(1, 26) if i != 10]
+    assert pages[0][0] == (1, 'Product 0', 1000, 0)
+
+
+def test_product_page_is_a_key_range_read(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000, 1) for i in range(50)])
+
+    assert find_full_scans(db, lambda: db.get_product_page(20, 10)) == []
+
+
+def test_changes_since_cursor(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000, 10) for i in range(5)])
+    _, _, cursor = db.get_product_changes()
+
+    db.update_product(2, 'Product 1', 1500, 10)
+    db.delete_product(4)
+    new_id = db.add_product('Kids Hat', 8000, 3)
+    changed, deleted, next_cursor = db.get_product_changes(cursor)
+
+    assert changed == [(2, 'Product 1', 1500, 10), (new_id, 'Kids Hat', 8000, 3)]
+    assert deleted == [4]
+    assert next_cursor > cursor
+    assert db.get_product_changes(next_cursor) == ([], [], next_cursor)
+
+
+def test_change_committed_after_a_refresh_is_not_lost(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000, 10) for i in range(3)])
+    _, _, cursor = db.get_product_changes()
+    other = sqlite3.connect(db.db_name)
+    other.execute('BEGIN IMMEDIATE')
+    other.execute('UPDATE products SET quantity = 7 WHERE product_id = 1')
+
+    # A refresh while the other connection still holds its transaction
+    changed, _, cursor = db.get_product_changes(cursor)
+    assert changed == []
+    other.commit()
+    other.close()
+
+    changed, _, _ = db.get_product_changes(cursor)
+    assert changed == [(1, 'Product 0', 1000, 7)]
+
+
+def test_restored_product_is_not_reported_deleted(db):
+    product_id = db.add_product('Kids Dress', 35000, 4)
+    _, _, cursor = db.get_product_changes()
+    db.delete_product(product_id)
+    db.bulk_upsert_products([(product_id, 'Kids Dress', 35000, 4)])
+
+    changed, deleted, _ = db.get_product_changes(cursor)
+
+    assert [product[0] for product in changed] == [product_id]
+    assert deleted == []
+
+
+def test_pruned_changes_ask_for_a_reload(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000, 10) for i in range(5)])
+    _, _, old_cursor = db.get_product_changes()
+    for quantity in range(3):
+        db.update_product(1, 'Product 0', 1000, quantity)
+    _, _, cursor = db.get_product_changes()
+    db.update_product(2, 'Product 1', 1000, 5)
+
+    assert db.prune_product_changes(keep=2) == 7
+    assert db.get_product_changes(old_cursor) is None
+
+    changed, _, _ = db.get_product_changes(cursor)
+    assert changed == [(2, 'Product 1', 1000, 5)]
+
+
+def test_change_queries_use_an_index(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000, 1) for i in range(50)])
+
+    assert find_full_scans(db, lambda: db.get_product_changes(10)) == []
@@ -0,0 +1,60 @@
+"""
+Test Inventory Summary
+Checks that the inventory_summary row kept by triggers always equals a full
+recount of the products table, and that a damaged row can be repaired
+"""
+
+import pytest
+
+from conftest import make_item
+from main import ReceiptGenerator
+
+
+def assert_summary_matches(db):
+    product_count, total_value, low_stock_count = db.get_inventory_summary()
+    expected = db._compute_inventory_summary()
+
+    assert (product_count, low_stock_count) == (expected[0], expected[2])
+    assert total_value == pytest.approx(expected[1])
+    assert db.check_inventory_summary()
+
+
+def test_summary_of_an_empty_catalogue(db):
+    assert db.get_inventory_summary() == (0, 0, 0)
+    assert_summary_matches(db)
+
+
+def test_summary_follows_every_kind_of_write(db):
+    dress = db.add_product('Kids Dress', 35000, 4)
+    shorts = db.add_product('Kids Shorts', 12000, 25)
+    assert_summary_matches(db)
+
+    db.update_product(dress, 'Kids Dress', 37000, 15)  # leaves low stock
+    db.update_product(shorts, 'Kids Shorts', 12000, 3)  # drops into it
+    assert_summary_matches(db)
+    assert db.get_inventory_summary()[2] == 1
+
+    db.checkout([make_item(dress, 'Kids Dress', 37000, 6)], ReceiptGenerator.build_filename)
+    assert_summary_matches(db)
+    assert db.get_inventory_summary()[2] == 2
+
+    db.bulk_upsert_products([(shorts, 'Kids Shorts', 15000, 40), (None, 'Baby Socks', 3000, 2)])
+    assert_summary_matches(db)
+
+    db.delete_product(dress)
+    assert_summary_matches(db)
+    assert db.get_inventory_summary() == (2, 15000 * 40 + 3000 * 2, 1)
+
+
+def test_repair_rebuilds_a_corrupted_summary(db):
+    db.bulk_upsert_products([(None, f"Product {i}", 1000, i) for i in range(20)])
+    db.cursor.execute('UPDATE inventory_summary SET product_count = 999, total_value = -1, low_stock_count = 0')
+    db.conn.commit()
+
+    assert not db.check_inventory_summary()
+    assert db.get_inventory_summary() == (999, -1, 0)  # checking alone changes nothing
+
+    assert not db.check_inventory_summary(repair=True)  # reports what it found
+
+    assert_summary_matches(db)
+    assert db.get_inventory_summary() == (20, 1000 * sum(range(20)), 10)
@@ -0,0 +1,151 @@
+"""
+Test Invoice Archive
+Checks month-sharded invoice storage, monthly bundles, invoice lookup and
+the on-demand invoice cache
+"""
+
+import os
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from conftest import make_item
+from main import InvoiceArchive, InvoiceCache, ReceiptGenerator
+
+TODAY = datetime(2025, 3, 15)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return InvoiceArchive(str(tmp_path))
+
+
+def write_invoice(archive, filename, content=b'%PDF-1.3 test'):
+    path = os.path.join(archive.receipts_folder, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def test_sharded_invoice_is_found_in_place(archive):
+    path = write_invoice(archive, '2025/03/invoice_1_20250301_101500.pdf')
+
+    assert archive.locate('2025/03/invoice_1_20250301_101500.pdf') == path
+
+
+def test_legacy_flat_invoice_still_resolves_after_sharding(archive, tmp_path):
+    write_invoice(archive, 'invoice_7_20240105_093000.pdf')
+
+    assert archive.shard_legacy_invoices() == 1
+    assert not (tmp_path / 'invoice_7_20240105_093000.pdf').exists()
+    assert archive.locate('invoice_7_20240105_093000.pdf') == str(tmp_path / '2024' / '01' / 'invoice_7_20240105_093000.pdf')
+
+
+def test_closed_months_are_bundled(archive, tmp_path):
+    write_invoice(archive, '2025/01/invoice_1_20250110_100000.pdf', b'%PDF-january')
+    write_invoice(archive, '2025/02/invoice_2_20250210_100000.pdf', b'%PDF-february')
+    write_invoice(archive, '2025/03/invoice_3_20250310_100000.pdf', b'%PDF-march')
+
+    assert archive.archive_closed_months(today=TODAY) == 2
+
+    assert not (tmp_path / '2025' / '01').exists()
+    assert (tmp_path / '2025' / '03' / 'invoice_3_20250310_100000.pdf').exists()  # current month stays
+    assert sorted(archive.read_index()) == ['2025/01', '2025/02']
+    assert archive.read_index()['2025/01']['invoices'] == 1
+
+    extracted = archive.locate('2025/01/invoice_1_20250110_100000.pdf')
+    with open(extracted, 'rb') as f:
+        assert f.read() == b'%PDF-january'
+
+
+def test_late_invoices_are_added_to_an_existing_bundle(archive, tmp_path):
+    write_invoice(archive, '2025/01/invoice_1_20250110_100000.pdf')
+    archive.archive_closed_months(today=TODAY)
+    write_invoice(archive, '2025/01/invoice_9_20250131_235959.pdf')
+
+    assert archive.archive_closed_months(today=TODAY) == 1
+
+    with zipfile.ZipFile(tmp_path / 'archive' / '2025-01.zip') as bundle:
+        assert sorted(bundle.namelist()) == ['2025/01/invoice_1_20250110_100000.pdf',
+                                             '2025/01/invoice_9_20250131_235959.pdf']
+
+
+def test_invoice_evicted_while_archiving_is_skipped(archive, tmp_path, monkeypatch):
+    write_invoice(archive, '2025/01/invoice_1_20250110_100000.pdf')
+    evicted = write_invoice(archive, '2025/01/invoice_2_20250111_100000.pdf')
+    write_zip = zipfile.ZipFile.write
+
+    def write_after_eviction(self, filename, *args, **kwargs):
+        if os.path.exists(evicted):
+            os.remove(evicted)  # InvoiceCacheEviction gets there first
+        return write_zip(self, filename, *args, **kwargs)
+    monkeypatch.setattr(zipfile.ZipFile, 'write', write_after_eviction)
+
+    assert archive.archive_closed_months(today=TODAY) == 1
+
+    assert archive.read_index()['2025/01']['invoices'] == 1
+    assert not (tmp_path / '2025' / '01').exists()
+    assert sorted(os.listdir(tmp_path / 'archive')) == ['2025-01.zip', 'index.json']
+
+
+def test_partial_bundles_are_removed(archive, tmp_path):
+    write_invoice(archive, 'archive/2025-01.zip.part', b'PK truncated')
+
+    archive.archive_closed_months(today=TODAY)
+
+    assert not (tmp_path / 'archive' / '2025-01.zip.part').exists()
+
+
+def test_unknown_invoice_is_not_found(archive):
+    assert archive.locate('2025/01/invoice_404_20250101_000000.pdf') is None
+    assert archive.locate('receipt.pdf') is None
+
+
+def test_missing_invoice_is_rendered_from_the_database(db, archive, tmp_path):
+    product = db.add_product('Kids Dress', 35000, 5)
+    receipt_id, receipt_number, filename = db.checkout([make_item(product, 'Kids Dress', 35000, 2)],
+                                                       ReceiptGenerator.build_filename)
+    cache = InvoiceCache(archive)
+
+    path = cache.get_invoice(db, receipt_id, filename)
+
+    assert path == os.path.join(archive.extract_folder, filename)
+    assert archive.closed_months(datetime(2100, 1, 1)) == []  # nothing for archive_month to re-bundle
+    with open(path, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+    # Now on disk, the second open doesn't render again
+    os.utime(path, (0, 0))
+    assert cache.get_invoice(db, receipt_id, filename) == path
+    assert os.path.getmtime(path) > 0
+
+
+def test_unknown_receipt_has_no_invoice(db, archive):
+    assert InvoiceCache(archive).get_invoice(db, 999, '2025/01/invoice_999_20250101_000000.pdf') is None
+
+
+def test_extracted_invoice_is_counted_once(archive):
+    write_invoice(archive, '2025/01/invoice_1_20250110_100000.pdf', b'x' * 1000)
+    archive.archive_closed_months(today=TODAY)
+    cache = InvoiceCache(archive)
+    cache.evict()  # nothing loose left to count
+
+    for _ in range(3):
+        cache.get_invoice(None, 1, '2025/01/invoice_1_20250110_100000.pdf')
+
+    assert cache.usage == 1000
+
+
+def test_least_recently_used_invoices_are_evicted(archive, tmp_path):
+    paths = [write_invoice(archive, f"2025/01/invoice_{i}_20250110_100000.pdf", b'x' * 1000) for i in range(5)]
+    for age, path in enumerate(reversed(paths)):
+        os.utime(path, (1000 - age, 1000 - age))  # paths[0] is the oldest
+    reprint = write_invoice(archive, 'reprints/2025/01/invoice_0_20250110_100000.pdf', b'x' * 1000)
+    cache = InvoiceCache(archive, max_bytes=3000)
+
+    assert cache.evict() == 3  # down to 90% of the budget
+
+    assert [os.path.exists(path) for path in paths] == [False, False, False, True, True]
+    assert os.path.exists(reprint)
+    assert cache.usage == 2000
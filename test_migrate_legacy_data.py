@@ -0,0 +1,64 @@
+"""
+Test Legacy Data Migration
+Checks that inventory.json / users.json are streamed into the database,
+that running the migration twice changes nothing and that product_id
+collisions with other products are reported
+"""
+
+import json
+
+import pytest
+
+from migrate_legacy_data import iter_json_array, migrate_legacy_data
+
+
+@pytest.fixture
+def legacy_files(tmp_path):
+    inventory = tmp_path / 'inventory.json'
+    inventory.write_text(json.dumps([
+        {'product_id': 1, 'name': 'Kids Dress', 'price': 35000, 'quantity': 4},
+        {'product_id': 2, 'name': 'Kids Shorts', 'price': 12000, 'quantity': 10},
+        {'product_id': 3, 'name': '', 'price': 1000, 'quantity': 1},
+    ]))
+    users = tmp_path / 'users.json'
+    users.write_text(json.dumps([
+        {'username': 'joanah', 'password': 'secret123', 'full_name': 'Joanah K', 'email': 'j@example.com'},
+        {'username': 'joanah', 'password': 'other456', 'full_name': 'Someone Else', 'email': 's@example.com'},
+        {'username': 'peter', 'password': 'secret789', 'full_name': 'Peter M', 'email': 'p@example.com'},
+    ]))
+    return str(inventory), str(users)
+
+
+def test_legacy_files_are_migrated(db, legacy_files):
+    summary = migrate_legacy_data(db, *legacy_files, batch_size=2)
+
+    assert summary == {'products': (3, 2, 1, []), 'users': (3, 2, 0, [])}
+    assert db.get_all_products() == [(1, 'Kids Dress', 35000, 4), (2, 'Kids Shorts', 12000, 10)]
+    assert db.get_user('joanah')[1] == 'secret123'  # the first of the duplicate usernames wins
+
+
+def test_running_twice_changes_nothing(db, legacy_files):
+    migrate_legacy_data(db, *legacy_files)
+    products, summary = db.get_all_products(), db.get_inventory_summary()
+
+    assert migrate_legacy_data(db, *legacy_files) == {'products': (3, 0, 1, []), 'users': (3, 0, 0, [])}
+    assert db.get_all_products() == products
+    assert db.get_inventory_summary() == summary
+
+
+def test_product_id_taken_by_another_product_is_reported(db, legacy_files):
+    db.bulk_upsert_products([(2, 'Baby Bib', 4000, 30)])
+
+    read, added, skipped, conflicts = migrate_legacy_data(db, *legacy_files)['products']
+
+    assert (read, added, skipped) == (3, 1, 1)
+    assert conflicts == [(2, 'Kids Shorts', 'Baby Bib')]
+    assert db.get_product(2) == (2, 'Baby Bib', 4000, 30)
+
+
+def test_json_array_is_read_across_chunk_boundaries(tmp_path):
+    path = tmp_path / 'inventory.json'
+    records = [{'product_id': i, 'name': f"Product {i}"} for i in range(50)]
+    path.write_text(json.dumps(records))
+
+    assert list(iter_json_array(str(path), chunk_size=16)) == records
@@ -0,0 +1,86 @@
+"""
+Performance Regression Tests
+Key paths must not fall back to full table scans, and the benchmark gate
+must catch slowdowns against the committed baseline
+"""
+
+import json
+import os
+
+import pytest
+
+from benchmark import KEY_BENCHMARKS, compare_to_baseline, confirm_regressions, find_full_scans, run_benchmarks
+from conftest import make_item
+from main import ReceiptGenerator
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+@pytest.fixture
+def stocked_db(db):
+    """A database with some products and a recorded sale"""
+    rows = [(None, f"Product {i}", 1000 + i, i % 20) for i in range(200)]
+    db.bulk_upsert_products(rows)
+    db.checkout([make_item(1, 'Product 0', 1000, 0), make_item(2, 'Product 1', 1001, 1)],
+                ReceiptGenerator.build_filename)
+    db.register_user('joanah', 'boutique123', 'Kiwumulo Joanah', 'joanah@jkboutique.com')
+    db.cursor.execute('ANALYZE')
+    return db
+
+
+@pytest.mark.parametrize('name, operation', [
+    ('dashboard stats', lambda db: db.get_inventory_summary()),
+    ('low stock count', lambda db: db.get_low_stock_count()),
+    ('low stock report', lambda db: db.get_low_stock_products()),
+    ('total inventory value', lambda db: db.get_total_inventory_value()),
+    ('next product id', lambda db: db.get_next_product_id()),
+    ('next receipt number', lambda db: db.get_next_receipt_number()),
+    ('receipt history', lambda db: db.get_receipt_history()),
+    ('product lookup', lambda db: db.get_product(5)),
+    ('login lookup', lambda db: db.get_user('joanah')),
+    ('checkout', lambda db: db.checkout([make_item(3, 'Product 2', 1002, 1)], ReceiptGenerator.build_filename)),
+])
+def test_key_path_has_no_full_scan(stocked_db, name, operation):
+    assert find_full_scans(stocked_db, lambda: operation(stocked_db)) == []
+
+
+def test_full_scan_is_detected(stocked_db):
+    scans = find_full_scans(stocked_db, lambda: stocked_db.cursor.execute(
+        'SELECT COUNT(*) FROM products WHERE price > 1000'))
+
+    assert scans and scans[0][1].startswith('SCAN products')
+
+
+def test_compare_to_baseline_flags_slow_key_paths():
+    baseline = {'results': {'small': {
+        'checkout': {'p95_ms': 1.0},
+        'dashboard_stats': {'p95_ms': 0.004},
+    }}}
+    report = {'results': {'small': {
+        'checkout': {'p95_ms': 2.0},
+        'dashboard_stats': {'p95_ms': 0.008},
+    }}}
+
+    regressions = compare_to_baseline(report, baseline, tolerance=0.5)
+
+    # checkout doubled; the dashboard only moved by microseconds
+    assert len(regressions) == 1
+    assert regressions[0].startswith('small/checkout')
+
+
+def test_baseline_covers_key_benchmarks():
+    with open(BASELINE_FILE) as f:
+        baseline = json.load(f)
+
+    assert set(KEY_BENCHMARKS) <= set(baseline['results']['small'])
+
+
+@pytest.mark.skipif(not os.environ.get('BOUTIQUE_PERF_GATE'),
+                    reason="timing gate is machine dependent, set BOUTIQUE_PERF_GATE=1 to run it")
+def test_no_regression_against_baseline(tmp_path):
+    with open(BASELINE_FILE) as f:
+        baseline = json.load(f)
+
+    report = run_benchmarks(['small'], str(tmp_path), only=set(KEY_BENCHMARKS))
+
+    assert confirm_regressions(report, baseline, str(tmp_path)) == []
@@ -0,0 +1,71 @@
+"""
+Test Product Search
+Checks the type-ahead product search of the ReceiptPage
+"""
+
+import pytest
+
+from benchmark import find_full_scans
+
+
+@pytest.fixture
+def catalogue(db):
+    db.bulk_upsert_products([
+        (None, 'Kids Dress (Red, 4Y)', 35000, 5),
+        (None, 'Kids Shorts (Red, 4Y)', 12000, 3),
+        (None, 'Baby Dress (Blue, 0-3M)', 28000, 2),
+        (None, '100% Cotton Socks', 3000, 40),
+    ])
+    return db
+
+
+def names(rows):
+    return [row[1] for row in rows]
+
+
+def test_search_matches_every_word_and_a_half_typed_last_word(catalogue):
+    assert catalogue.has_product_fts
+    assert names(catalogue.search_products('dre')) == ['Kids Dress (Red, 4Y)', 'Baby Dress (Blue, 0-3M)']
+    assert names(catalogue.search_products('kids re')) == ['Kids Dress (Red, 4Y)', 'Kids Shorts (Red, 4Y)']
+    assert names(catalogue.search_products('BABY dress')) == ['Baby Dress (Blue, 0-3M)']
+
+
+def test_finished_last_word_is_not_a_prefix(catalogue):
+    assert catalogue.search_products('kid ') == []
+    assert len(catalogue.search_products('kids ')) == 2
+
+
+def test_results_carry_the_product_row(catalogue):
+    assert catalogue.search_products('shorts') == [(2, 'Kids Shorts (Red, 4Y)', 12000, 3)]
+    assert catalogue.search_products('   ') == []
+    assert catalogue.search_products('"*') == []
+
+
+def test_search_follows_renames_and_deletes(catalogue):
+    catalogue.update_product(1, 'Kids Skirt (Red, 4Y)', 35000, 5)
+    catalogue.delete_product(3)
+
+    assert catalogue.search_products('dress') == []
+    assert names(catalogue.search_products('skirt')) == ['Kids Skirt (Red, 4Y)']
+
+
+def test_bulk_upserts_keep_the_index_in_step(catalogue):
+    catalogue.bulk_upsert_products([
+        (1, 'Kids Dress (Red, 4Y)', 30000, 9),
+        (2, 'Kids Skort (Red, 4Y)', 12000, 3),
+        (None, 'Kids Jacket (Navy, 5Y)', 45000, 4),
+    ])
+
+    catalogue.cursor.execute("INSERT INTO products_fts (products_fts, rank) VALUES ('integrity-check', 1)")
+    assert names(catalogue.search_products('kids sk')) == ['Kids Skort (Red, 4Y)']
+    assert names(catalogue.search_products('jack')) == ['Kids Jacket (Navy, 5Y)']
+
+
+def test_name_prefix_search_without_fts(catalogue):
+    catalogue.cursor.execute('CREATE INDEX idx_products_name_nocase ON products (name COLLATE NOCASE)')
+    catalogue.has_product_fts = False
+
+    assert names(catalogue.search_products('kids ')) == ['Kids Dress (Red, 4Y)', 'Kids Shorts (Red, 4Y)']
+    assert names(catalogue.search_products('100%')) == ['100% Cotton Socks']
+    assert catalogue.search_products('dress') == []
+    assert find_full_scans(catalogue, lambda: catalogue.search_products('kids')) == []
@@ -1,136 +1,219 @@
 """
 Test Receipt Generation
-This script tests if the receipt generation is working
+Checks invoice rendering and the checkout that records a sale
 """
 
 import os
-import sys
-from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-
-def get_receipts_folder():
-    """Get the receipts folder path"""
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        base_path = os.path.dirname(sys.executable)
-    else:
-        # Running as script
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    
-    receipts_folder = os.path.join(base_path, 'receipts')
-    
-    # Create receipts folder if it doesn't exist
-    if not os.path.exists(receipts_folder):
-        os.makedirs(receipts_folder)
-        print(f"✅ Created receipts folder: {receipts_folder}")
-    else:
-        print(f"✅ Receipts folder exists: {receipts_folder}")
-    
-    return receipts_folder
-
-def test_receipt_generation():
-    """Test generating a sample receipt"""
-    print("\n" + "="*60)
-    print("TESTING RECEIPT GENERATION")
-    print("="*60)
-    
+import re
+import sqlite3
+import time
+
+import pytest
+from reportlab import rl_config
+
+from conftest import make_item
+from main import DatabaseManager, InsufficientStockError, InvoiceRenderQueue, ReceiptGenerator
+
+
+def test_generate_receipt_writes_pdf(tmp_path):
+    items = [
+        make_item(1, 'Kids T-Shirt', 15000, 2),
+        make_item(2, 'Kids Dress', 35000, 1),
+    ]
+
+    full_path = ReceiptGenerator.generate_receipt(items, 65000, 1, 'invoice_1.pdf', str(tmp_path))
+
+    assert full_path == str(tmp_path / 'invoice_1.pdf')
+    with open(full_path, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+
+
+def test_static_parts_are_a_shared_form_after_the_first_page(tmp_path):
+    items = [make_item(i, f"Item {i}", 1000, 1) for i in range(60)]
+
+    with_template = ReceiptGenerator.generate_receipt(items, 60000, 1, 'form.pdf', str(tmp_path))
+    one_page = ReceiptGenerator.generate_receipt(items[:5], 5000, 2, 'one_page.pdf', str(tmp_path))
+    inline = ReceiptGenerator.generate_receipt(items, 60000, 3, 'inline.pdf', str(tmp_path), use_template=False)
+
+    with open(with_template, 'rb') as f:
+        assert f.read().count(b'/FormXob.InvoiceTemplate') == 2  # in the resources of pages 2 and 3
+    for path in (one_page, inline):
+        with open(path, 'rb') as f:
+            assert b'/FormXob.InvoiceTemplate' not in f.read()
+
+
+def test_streams_skip_ascii85_without_changing_the_global_setting(tmp_path):
+    items = [make_item(1, 'Kids T-Shirt', 15000, 2)]
+    before = rl_config.useA85
+
+    full_path = ReceiptGenerator.generate_receipt(items, 30000, 1, 'invoice.pdf', str(tmp_path))
+
+    with open(full_path, 'rb') as f:
+        assert b'/ASCII85Decode' not in f.read()
+    assert rl_config.useA85 == before
+
+
+def test_long_invoice_continues_on_new_pages(tmp_path):
+    # A generator: the renderer must not need the lines as a list
+    items = (make_item(i, f"Wholesale Item {i}", 1000, 3) for i in range(1, 1001))
+
+    full_path = ReceiptGenerator.generate_receipt(items, 3000000, 9, 'wholesale.pdf', str(tmp_path))
+
+    with open(full_path, 'rb') as f:
+        page_count = int(re.search(rb'/Count (\d+)', f.read()).group(1))
+    rows_per_page = 22  # after the first page, one row goes to "Brought forward"
+    assert 1000 // rows_per_page <= page_count <= 1000 // rows_per_page + 2
+
+
+def test_short_invoice_is_one_page(tmp_path):
+    items = [make_item(i, f"Item {i}", 1000, 1) for i in range(20)]
+
+    full_path = ReceiptGenerator.generate_receipt(items, 20000, 10, 'short.pdf', str(tmp_path))
+
+    with open(full_path, 'rb') as f:
+        assert re.search(rb'/Count (\d+)', f.read()).group(1) == b'1'
+
+
+def test_build_filename_contains_receipt_number():
+    filename = ReceiptGenerator.build_filename(42)
+
+    assert re.match(r'^\d{4}/\d{2}/invoice_42_\d{8}_\d{6}\.pdf$', filename)
+
+
+def test_checkout_records_sale_and_decrements_stock(db):
+    dress = db.add_product('Kids Dress', 35000, 5)
+    shorts = db.add_product('Kids Shorts', 12000, 3)
+
+    receipt_id, receipt_number, filename = db.checkout(
+        [make_item(dress, 'Kids Dress', 35000, 2), make_item(shorts, 'Kids Shorts', 12000, 3)],
+        ReceiptGenerator.build_filename
+    )
+
+    assert receipt_number == 1
+    assert os.path.basename(filename).startswith('invoice_1_')
+    assert db.get_product(dress)[3] == 3
+    assert db.get_product(shorts)[3] == 0
+    history = db.get_receipt_history()
+    assert history[0][0] == receipt_id
+    assert history[0][2] == 35000 * 2 + 12000 * 3
+
+
+def test_checkout_short_stock_writes_nothing(db):
+    dress = db.add_product('Kids Dress', 35000, 5)
+    jacket = db.add_product('Kids Jacket', 45000, 1)
+
+    with pytest.raises(InsufficientStockError) as error:
+        db.checkout([make_item(dress, 'Kids Dress', 35000, 1), make_item(jacket, 'Kids Jacket', 45000, 2)],
+                    ReceiptGenerator.build_filename)
+
+    assert error.value.product_id == jacket
+    assert error.value.available == 1
+    assert db.get_product(dress)[3] == 5
+    assert db.get_receipt_history() == []
+    assert db.get_next_receipt_number() == 1
+
+
+def test_checkout_counts_repeated_product_lines_together(db):
+    dress = db.add_product('Kids Dress', 35000, 3)
+
+    with pytest.raises(InsufficientStockError):
+        db.checkout([make_item(dress, 'Kids Dress', 35000, 2), make_item(dress, 'Kids Dress', 35000, 2)],
+                    ReceiptGenerator.build_filename)
+
+    assert db.get_product(dress)[3] == 3
+
+
+def test_receipt_numbers_are_sequential_and_unique(db):
+    product = db.add_product('Baby Blanket', 30000, 10)
+
+    numbers = [db.checkout([make_item(product, 'Baby Blanket', 30000, 1)], ReceiptGenerator.build_filename)[1]
+               for _ in range(3)]
+
+    assert numbers == [1, 2, 3]
+    assert db.get_next_receipt_number() == 4
+    with pytest.raises(sqlite3.IntegrityError):
+        db.save_receipt(2, 30000, 'duplicate.pdf', [])
+
+
+def test_migration_renumbers_duplicate_receipt_numbers(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE receipts (
+            receipt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            receipt_number INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            filename TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany('INSERT INTO receipts (receipt_number, total_amount, filename) VALUES (?, 1, ?)',
+                     [(1, 'a.pdf'), (2, 'b.pdf'), (2, 'c.pdf')])
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(db_path)
+    try:
+        db.cursor.execute('SELECT receipt_number FROM receipts ORDER BY receipt_id')
+        numbers = [row[0] for row in db.cursor.fetchall()]
+        assert numbers[:2] == [1, 2]
+        assert len(set(numbers)) == 3
+        assert db.get_next_receipt_number() == max(numbers) + 1
+    finally:
+        db.close()
+
+
+def wait_for_renders(renderer, timeout=10):
+    """Collect finished render jobs until nothing is pending"""
+    finished = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs, still_pending = renderer.collect()
+        finished.extend(jobs)
+        if not still_pending:
+            return finished
+        time.sleep(0.01)
+    raise AssertionError("invoice renders did not finish")
+
+
+def test_render_queue_renders_in_background(tmp_path):
+    renderer = InvoiceRenderQueue(receipts_folder=str(tmp_path))
+    cart = [make_item(1, 'Kids T-Shirt', 15000, 2)]
+    try:
+        job = renderer.submit(cart, 30000, 7, 'invoice_7.pdf')
+        cart.clear()  # the till clears the cart straight after checkout
+
+        finished = wait_for_renders(renderer)
+    finally:
+        renderer.shutdown()
+
+    assert finished == [job]
+    assert job['error'] is None
+    assert job['path'] == str(tmp_path / 'invoice_7.pdf')
+    assert job['items'][0]['name'] == 'Kids T-Shirt'
+    assert renderer.failed == []
+
+
+def test_failed_render_is_retried_then_parked(tmp_path):
+    # A file where the receipts folder should be makes every render fail
+    blocked_folder = tmp_path / 'receipts'
+    blocked_folder.write_text('not a folder')
+    renderer = InvoiceRenderQueue(max_attempts=2, receipts_folder=str(blocked_folder))
     try:
-        # Get receipts folder
-        receipts_folder = get_receipts_folder()
-        
-        # Create test data
-        items = [
-            {'name': 'Kids T-Shirt', 'quantity': 2, 'price': 15000, 'subtotal': 30000},
-            {'name': 'Kids Dress', 'quantity': 1, 'price': 35000, 'subtotal': 35000}
-        ]
-        total = 65000
-        receipt_number = 1
-        
-        # Generate filename
-        filename = f"receipt_{receipt_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        full_path = os.path.join(receipts_folder, filename)
-        
-        print(f"\n📄 Creating receipt: {filename}")
-        print(f"📁 Full path: {full_path}")
-        
-        # Create PDF
-        c = canvas.Canvas(full_path, pagesize=letter)
-        width, height = letter
-        
-        # Header
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(1*inch, height - 1*inch, "JK's Boutique and Kid's Wear")
-        
-        c.setFont("Helvetica", 12)
-        c.drawString(1*inch, height - 1.3*inch, f"Receipt Number: {receipt_number}")
-        c.drawString(1*inch, height - 1.5*inch, f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Line
-        c.line(1*inch, height - 1.7*inch, width - 1*inch, height - 1.7*inch)
-        
-        # Items header
-        y_position = height - 2*inch
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(1*inch, y_position, "Product")
-        c.drawString(3.5*inch, y_position, "Quantity")
-        c.drawString(4.5*inch, y_position, "Price")
-        c.drawString(5.5*inch, y_position, "Subtotal")
-        
-        # Items
-        c.setFont("Helvetica", 11)
-        y_position -= 0.3*inch
-        for item in items:
-            c.drawString(1*inch, y_position, item['name'][:25])
-            c.drawString(3.5*inch, y_position, str(item['quantity']))
-            c.drawString(4.5*inch, y_position, f"UGX {item['price']:,.0f}")
-            c.drawString(5.5*inch, y_position, f"UGX {item['subtotal']:,.0f}")
-            y_position -= 0.25*inch
-        
-        # Total
-        y_position -= 0.2*inch
-        c.line(1*inch, y_position, width - 1*inch, y_position)
-        y_position -= 0.3*inch
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(4.5*inch, y_position, "TOTAL:")
-        c.drawString(5.5*inch, y_position, f"UGX {total:,.0f}")
-        
-        # Footer
-        c.setFont("Helvetica-Italic", 10)
-        c.drawString(1*inch, 1*inch, "Thank you for shopping with us!")
-        
-        c.save()
-        
-        print(f"\n✅ SUCCESS! Receipt generated successfully!")
-        print(f"📁 Location: {full_path}")
-        print(f"📏 File size: {os.path.getsize(full_path)} bytes")
-        
-        # Verify file exists
-        if os.path.exists(full_path):
-            print(f"✅ File verified: EXISTS")
-        else:
-            print(f"❌ ERROR: File does not exist!")
-        
-        return True
-        
-    except Exception as e:
-        print(f"\n❌ ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return False
-
-if __name__ == "__main__":
-    print("\n🧪 RECEIPT GENERATION TEST")
-    print("="*60)
-    
-    success = test_receipt_generation()
-    
-    print("\n" + "="*60)
-    if success:
-        print("✅ ALL TESTS PASSED!")
-    else:
-        print("❌ TESTS FAILED!")
-    print("="*60)
-    
-    input("\nPress Enter to exit...")
+        renderer.submit([make_item(1, 'Kids Dress', 35000, 1)], 35000, 8, 'invoice_8.pdf')
+
+        [job] = wait_for_renders(renderer)
+        assert job['error'] is not None
+        assert job['attempts'] == 2
+        assert renderer.failed == [job]
+
+        blocked_folder.unlink()
+        blocked_folder.mkdir()
+        assert renderer.retry_failed() == 1
+        [job] = wait_for_renders(renderer)
+    finally:
+        renderer.shutdown()
+
+    assert job['error'] is None
+    assert (blocked_folder / 'invoice_8.pdf').exists()
+    assert renderer.failed == []
@@ -0,0 +1,67 @@
+"""
+Test Receipt History
+Checks keyset paging, the history filters and the running total
+"""
+
+import pytest
+
+from benchmark import find_full_scans
+from conftest import make_item
+
+
+@pytest.fixture
+def history_db(db):
+    """Twelve sales over three days, two of them in the same second"""
+    product = db.add_product('Kids Dress', 1000, 1000)
+    for n in range(12):
+        db.checkout([make_item(product, 'Kids Dress', 1000, n + 1)], lambda number: f"invoice_{number}.pdf")
+    stamps = ['2025-03-01 09:00:00'] * 4 + ['2025-03-02 09:00:00'] * 4 + ['2025-03-03 09:00:00'] * 4
+    for receipt_id, created_at in enumerate(stamps, start=1):
+        db.cursor.execute('UPDATE receipts SET created_at = ? WHERE receipt_id = ?', (created_at, receipt_id))
+    db.conn.commit()
+    return db
+
+
+def all_pages(db, limit, **filters):
+    rows, before = [], None
+    while True:
+        page = db.get_receipt_page(before, limit, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        before = (page[-1][4], page[-1][0])
+
+
+def test_pages_cover_every_receipt_once_newest_first(history_db):
+    rows = all_pages(history_db, limit=5)
+
+    assert [row[0] for row in rows] == list(range(12, 0, -1))  # ties on created_at keep receipt_id order
+
+
+def test_date_range_filter(history_db):
+    rows = all_pages(history_db, limit=3, since='2025-03-02 00:00:00', until='2025-03-03 00:00:00')
+
+    assert [row[0] for row in rows] == [8, 7, 6, 5]
+
+
+def test_amount_and_number_filters(history_db):
+    assert [row[0] for row in all_pages(history_db, 2, min_amount=3000, max_amount=5000)] == [5, 4, 3]
+    assert [row[0] for row in history_db.get_receipt_page(receipt_number=7)] == [7]
+
+
+def test_running_total_follows_the_filters(history_db):
+    assert history_db.get_receipt_totals() == (12, sum(range(1, 13)) * 1000)
+    assert history_db.get_receipt_totals(since='2025-03-03 00:00:00') == (4, (9 + 10 + 11 + 12) * 1000)
+    assert history_db.get_receipt_totals(min_amount=1_000_000) == (0, 0)
+
+
+@pytest.mark.parametrize('name, operation', [
+    ('first page', lambda db: db.get_receipt_page()),
+    ('deep page', lambda db: db.get_receipt_page(('2025-03-02 09:00:00', 6))),
+    ('date range page', lambda db: db.get_receipt_page(None, 50, '2025-03-01 00:00:00', '2025-03-02 00:00:00')),
+    ('amount filter page', lambda db: db.get_receipt_page(None, 50, min_amount=3000)),
+    ('date range totals', lambda db: db.get_receipt_totals('2025-03-01 00:00:00', None, 3000)),
+    ('amount totals', lambda db: db.get_receipt_totals(None, None, 3000, 5000)),
+])
+def test_history_queries_use_an_index(history_db, name, operation):
+    assert find_full_scans(history_db, lambda: operation(history_db)) == []
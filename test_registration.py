@@ -1,116 +1,44 @@
 """
-Test Script - Registration System Verification
-Run this to verify the registration system works correctly
+Test Registration System
+Checks user registration and lookup against a throwaway database
 """
 
-import sqlite3
-import os
+from main import DataManager, User
 
-def check_registration_system():
-    """Verify registration system components"""
-    
-    print("=" * 70)
-    print("JK'S BOUTIQUE - REGISTRATION SYSTEM VERIFICATION")
-    print("=" * 70)
-    print()
-    
-    # Check if main.py exists
-    if os.path.exists('main.py'):
-        print("✅ main.py found")
-        
-        # Check if RegistrationPage class exists
-        with open('main.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-            if 'class RegistrationPage' in content:
-                print("✅ RegistrationPage class found")
-            else:
-                print("❌ RegistrationPage class NOT found")
-                
-            if 'def register(self):' in content:
-                print("✅ register() method found")
-            else:
-                print("❌ register() method NOT found")
-                
-            if '"Register here"' in content:
-                print("✅ Registration link found on login page")
-            else:
-                print("❌ Registration link NOT found")
-    else:
-        print("❌ main.py NOT found")
-    
-    print()
-    
-    # Check database structure
-    if os.path.exists('boutique.db'):
-        print("✅ Database found (boutique.db)")
-        
-        conn = sqlite3.connect('boutique.db')
-        cursor = conn.cursor()
-        
-        # Check if users table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-        if cursor.fetchone():
-            print("✅ users table exists")
-            
-            # Check table structure
-            cursor.execute("PRAGMA table_info(users)")
-            columns = cursor.fetchall()
-            column_names = [col[1] for col in columns]
-            
-            required_columns = ['user_id', 'username', 'password', 'full_name', 'email', 'created_at']
-            for col in required_columns:
-                if col in column_names:
-                    print(f"   ✅ Column '{col}' exists")
-                else:
-                    print(f"   ❌ Column '{col}' missing")
-            
-            # Count users
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
-            print(f"\n📊 Total registered users: {user_count}")
-            
-            if user_count > 0:
-                print("\n👥 Registered Users:")
-                cursor.execute("SELECT username, full_name, email, created_at FROM users ORDER BY created_at DESC LIMIT 5")
-                users = cursor.fetchall()
-                for user in users:
-                    print(f"   • {user[1]} (@{user[0]}) - {user[2]}")
-        else:
-            print("❌ users table NOT found")
-        
-        conn.close()
-    else:
-        print("⚠️  Database not created yet (will be created on first run)")
-    
-    print()
-    print("=" * 70)
-    print("REGISTRATION SYSTEM STATUS")
-    print("=" * 70)
-    print()
-    print("✅ Registration page is IMPLEMENTED and READY!")
-    print()
-    print("📋 Features:")
-    print("   ✅ Full Name field")
-    print("   ✅ Email field")
-    print("   ✅ Username field")
-    print("   ✅ Password field (masked)")
-    print("   ✅ Confirm Password field (masked)")
-    print("   ✅ Field validation")
-    print("   ✅ Username uniqueness check")
-    print("   ✅ Password confirmation")
-    print("   ✅ Email format validation")
-    print("   ✅ Database storage")
-    print("   ✅ Link from login page")
-    print("   ✅ Auto-redirect after success")
-    print()
-    print("🚀 TO USE:")
-    print("   1. Run: python main.py")
-    print("   2. Click 'Register here' on login page")
-    print("   3. Fill the registration form")
-    print("   4. Click 'Register' button")
-    print("   5. Login with your new credentials")
-    print()
-    print("=" * 70)
 
-if __name__ == "__main__":
-    check_registration_system()
+def test_register_user_and_lookup(db):
+    assert db.register_user('joanah', 'boutique123', 'Kiwumulo Joanah', 'joanah@jkboutique.com')
+
+    assert db.username_exists('joanah')
+    assert db.get_user('joanah') == ('joanah', 'boutique123', 'Kiwumulo Joanah', 'joanah@jkboutique.com')
+
+
+def test_duplicate_username_is_rejected(db):
+    assert db.register_user('manager', 'manager456', 'Store Manager', 'manager@jkboutique.com')
+
+    assert not db.register_user('manager', 'other123', 'Someone Else', 'else@jkboutique.com')
+    assert db.get_user('manager')[2] == 'Store Manager'
+
+
+def test_unknown_user(db):
+    assert not db.username_exists('nobody')
+    assert db.get_user('nobody') is None
+
+
+def test_users_table_columns(db):
+    db.cursor.execute('PRAGMA table_info(users)')
+    columns = [column[1] for column in db.cursor.fetchall()]
+
+    assert columns == ['user_id', 'username', 'password', 'full_name', 'email', 'created_at']
+
+
+def test_data_manager_registers_user_objects(tmp_path):
+    data_manager = DataManager(db_name=str(tmp_path / 'test.db'))
+    try:
+        user = User('joanah', 'boutique123', 'Kiwumulo Joanah', 'joanah@jkboutique.com')
+
+        assert data_manager.register_user(user)
+        assert data_manager.username_exists('joanah')
+        assert data_manager.get_user('joanah').to_dict() == user.to_dict()
+    finally:
+        data_manager.db.close()
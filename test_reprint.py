@@ -0,0 +1,95 @@
+"""
+Test Invoice Reprint
+Checks that invoices are re-rendered from the database and that runs resume
+"""
+
+import json
+import time
+
+import pytest
+
+from conftest import make_item
+from main import ReceiptGenerator, parse_created_at
+from reprint_invoices import day_bound, load_checkpoint, reprint_invoices
+
+
+@pytest.fixture
+def kampala_time(monkeypatch):
+    """Local time pinned to UTC+3 so UTC conversions can't pass by accident"""
+    monkeypatch.setenv('TZ', 'Africa/Kampala')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def sales_db(db, tmp_path):
+    """A database file with five recorded sales"""
+    dress = db.add_product('Kids Dress', 35000, 50)
+    shorts = db.add_product('Kids Shorts', 12000, 50)
+    for quantity in range(1, 6):
+        db.checkout([make_item(dress, 'Kids Dress', 35000, quantity), make_item(shorts, 'Kids Shorts', 12000, 1)],
+                    lambda number: f"invoice_{number}.pdf")
+    return str(tmp_path / 'test.db')
+
+
+def test_receipts_are_streamed_with_their_lines(db):
+    product = db.add_product('Baby Blanket', 30000, 10)
+    for _ in range(3):
+        db.checkout([make_item(product, 'Baby Blanket', 30000, 2)], ReceiptGenerator.build_filename)
+
+    first_batch = db.get_receipts_with_items(after_id=0, limit=2)
+    second_batch = db.get_receipts_with_items(after_id=first_batch[-1][0], limit=2)
+
+    assert [receipt[1] for receipt in first_batch + second_batch] == [1, 2, 3]
+    assert second_batch[0][5] == [make_item(product, 'Baby Blanket', 30000, 2)]
+
+
+def test_reprint_renders_selected_receipts(sales_db, tmp_path):
+    output = tmp_path / 'reprints'
+
+    summary = reprint_invoices(sales_db, str(output), first_id=2, last_id=4, workers=2, chunk_size=1,
+                               verbose=False)
+
+    assert summary['rendered'] == 3
+    assert summary['failed'] == []
+    assert sorted(path.name for path in output.glob('*.pdf')) == ['invoice_2.pdf', 'invoice_3.pdf', 'invoice_4.pdf']
+    assert (output / 'invoice_3.pdf').read_bytes().startswith(b'%PDF-')
+
+
+def test_reprint_resumes_from_checkpoint(sales_db, tmp_path):
+    output = tmp_path / 'reprints'
+    output.mkdir()
+    selection = {'first_id': None, 'last_id': None, 'since': None, 'until': None}
+    checkpoint_path = output / 'reprint_checkpoint.json'
+    checkpoint_path.write_text(json.dumps({'selection': selection, 'last_receipt_id': 3,
+                                           'rendered': 3, 'failed': []}))
+
+    summary = reprint_invoices(sales_db, str(output), workers=1, verbose=False)
+
+    assert summary['rendered'] == 2
+    assert summary['resumed_from'] == 3
+    assert sorted(path.name for path in output.glob('*.pdf')) == ['invoice_4.pdf', 'invoice_5.pdf']
+    assert load_checkpoint(str(checkpoint_path), selection)['last_receipt_id'] == 5
+
+
+def test_checkpoint_for_another_selection_is_refused(sales_db, tmp_path):
+    output = tmp_path / 'reprints'
+    reprint_invoices(sales_db, str(output), last_id=1, workers=1, verbose=False)
+
+    with pytest.raises(ValueError, match='different reprint'):
+        reprint_invoices(sales_db, str(output), last_id=2, workers=1, verbose=False)
+
+
+def test_created_at_is_read_as_utc(kampala_time):
+    assert parse_created_at('2025-03-01 12:00:00').hour == 15
+    assert parse_created_at('2025-03-01 22:30:00.123').strftime('%Y-%m-%d %H:%M') == '2025-03-02 01:30'
+
+
+def test_day_bounds_are_local_midnight_in_utc(kampala_time):
+    since, until = day_bound('2025-03-02'), day_bound('2025-03-02', inclusive_end=True)
+
+    assert (since, until) == ('2025-03-01 21:00:00', '2025-03-02 21:00:00')
+    assert since <= '2025-03-01 22:30:00' < until  # 01:30 on the 2nd in Kampala
+    assert not since <= '2025-03-02 22:30:00' < until  # already the 3rd there
@@ -0,0 +1,75 @@
+"""
+Test SKU / Barcode
+Checks barcode lookups for the scan-to-cart till and SKUs in the import
+and export
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from benchmark import find_full_scans
+from import_products import import_products
+from main import normalize_sku, write_products_json
+
+
+def test_product_is_found_by_its_barcode(db):
+    product_id = db.add_product('Kids Dress', 35000, 4, sku='6001234500017')
+    db.add_product('Kids Shorts', 12000, 2)  # products without a barcode can coexist
+
+    assert db.get_product_by_sku('6001234500017') == (product_id, 'Kids Dress', 35000, 4)
+    assert db.get_product_by_sku('0000') is None
+    assert find_full_scans(db, lambda: db.get_product_by_sku('6001234500017')) == []
+
+
+def test_barcode_is_unique(db):
+    db.add_product('Kids Dress', 35000, 4, sku='ABC-1')
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_product('Kids Skirt', 30000, 4, sku='ABC-1')
+
+
+def test_upsert_without_sku_keeps_the_barcode(db):
+    product_id = db.add_product('Kids Dress', 35000, 4, sku='ABC-1')
+
+    db.bulk_upsert_products([(product_id, 'Kids Dress', 36000, 6)])
+
+    assert db.get_product_by_sku('ABC-1') == (product_id, 'Kids Dress', 36000, 6)
+
+
+def test_sku_is_trimmed_and_optional():
+    assert normalize_sku('  6001234500017 ') == '6001234500017'
+    assert normalize_sku('') is None
+    assert normalize_sku(None) is None
+    with pytest.raises(ValueError):
+        normalize_sku('600 123')
+
+
+def test_import_rejects_only_the_rows_with_a_taken_sku(db, tmp_path):
+    db.add_product('Kids Dress', 35000, 4, sku='ABC-1')
+    catalogue = tmp_path / 'catalogue.csv'
+    catalogue.write_text('name,price,quantity,sku\n'
+                         'Kids Hat,8000,3,HAT-1\n'
+                         'Kids Skirt,30000,4,ABC-1\n'
+                         'Kids Socks,3000,40,\n')
+    rejects = []
+
+    stats = import_products(db, str(catalogue), on_reject=lambda line, record, reason: rejects.append(line))
+
+    assert (stats['imported'], stats['rejected']) == (2, 1)
+    assert rejects == [3]
+    assert db.get_product_by_sku('HAT-1')[1] == 'Kids Hat'
+
+
+def test_export_includes_the_barcode(db, tmp_path):
+    db.add_product('Kids Dress', 35000, 4, sku='6001234500017')
+    db.add_product('Kids Shorts', 12000, 2)
+    db.add_product('Baby Socks', 3000, 9, sku='6001234500024')
+    path = tmp_path / 'products_export.json'
+
+    assert write_products_json(db, str(path), page_size=2) == 3
+    exported = json.loads(path.read_text())
+    assert [(product['name'], product['sku']) for product in exported] == [
+        ('Kids Dress', '6001234500017'), ('Kids Shorts', None), ('Baby Socks', '6001234500024')]
+